@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Header-only audit of the generated audio
+Scans MP3 frame headers (nothing is decoded) across the output tree in parallel,
+writes audio_index.json next to generation_report.json and flags demos that are
+empty, truncated, outside the target length or encoded at the wrong bitrate
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from mp3_tools import lowest_bitrate, scan_file
+
+INDEX_NAME = 'audio_index.json'
+
+# Outlier flags, in the order they are reported
+FLAGS = ('empty', 'truncated', 'too_short', 'too_long', 'bitrate_mismatch', 'sample_rate_mismatch')
+
+
+def _scan(path: str) -> Tuple[str, Dict]:
+    """Frame statistics for one file (runs in a worker process)"""
+    stat = os.stat(path)
+    stats = scan_file(path)
+    stats.update(bytes=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    return path, stats
+
+
+def flag(stats: Dict, targets: Dict) -> List[str]:
+    """Outlier flags for one file's statistics"""
+    if not stats['bytes'] or not stats['frames']:
+        return ['empty']
+
+    flags = []
+    declared = stats.get('declared_frames')
+    if stats['partial_frame'] or (declared is not None and stats['frames'] < declared):
+        flags.append('truncated')
+    if stats['duration_seconds'] < targets['min_seconds']:
+        flags.append('too_short')
+    elif stats['duration_seconds'] > targets['max_seconds']:
+        flags.append('too_long')
+
+    # Silence frames use the lowest bitrate; every other frame must be at the configured one
+    speech_bitrates = {int(bitrate) for bitrate in stats['bitrates']} - {lowest_bitrate(targets['sample_rate'])}
+    if speech_bitrates - {targets['bitrate']}:
+        flags.append('bitrate_mismatch')
+    if {int(rate) for rate in stats['sample_rates']} != {targets['sample_rate']}:
+        flags.append('sample_rate_mismatch')
+    return flags
+
+
+def describe(stats: Dict, flags: List[str]) -> str:
+    """One line explaining a file's flags"""
+    details = []
+    for name in flags:
+        if name in ('too_short', 'too_long'):
+            details.append(f"{name} ({stats['duration_seconds']:.1f}s)")
+        elif name == 'truncated':
+            if stats.get('declared_frames') is not None and stats['frames'] < stats['declared_frames']:
+                details.append(f"truncated ({stats['frames']} of {stats['declared_frames']} frames)")
+            else:
+                details.append("truncated (ends mid-frame)")
+        elif name == 'bitrate_mismatch':
+            details.append(f"bitrate_mismatch ({', '.join(str(b) for b in sorted(map(int, stats['bitrates'])))} kbps)")
+        elif name == 'sample_rate_mismatch':
+            details.append(f"sample_rate_mismatch ({', '.join(str(r) for r in sorted(map(int, stats['sample_rates'])))} Hz)")
+        else:
+            details.append(f"{name} ({stats['bytes']} bytes)")
+    return ', '.join(details)
+
+
+def _report_industries(output_dir: Path) -> Dict[str, str]:
+    """Audio file name -> industry for the demos in generation_report.json"""
+    try:
+        with open(output_dir / 'generation_report.json', 'r') as f:
+            report = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {Path(item['audio_file']).name: item['industry'] for item in report.get('success', [])}
+
+
+def _write_index(path: Path, index: Dict):
+    """Replace the index atomically"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def audit(output_dir: Path, config: Dict, workers: Optional[int] = None, rescan: bool = False) -> Dict:
+    """Scan every MP3 under `output_dir` and write the audio index
+
+    Files whose size and modification time match the previous index are not
+    scanned again, so re-running after each batch only reads the new audio.
+    Temporary and hidden directories (segment and cache scratch space) are
+    skipped.
+    """
+    audit_config = config.get('audit', {})
+    targets = {
+        'min_seconds': audit_config.get('min_seconds', 90),
+        'max_seconds': audit_config.get('max_seconds', 120),
+        'bitrate': config['output']['bitrate'],
+        'sample_rate': config['output']['sample_rate'],
+    }
+    started = time.monotonic()
+    index_path = output_dir / INDEX_NAME
+
+    previous: Dict[str, Dict] = {}
+    if not rescan:
+        try:
+            with open(index_path, 'r') as f:
+                previous = json.load(f).get('files', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    files: Dict[str, Dict] = {}
+    to_scan: List[str] = []
+    for path in sorted(output_dir.rglob('*.mp3')):
+        relative = path.relative_to(output_dir)
+        if any(part.startswith('.') for part in relative.parts):
+            continue
+        stat = path.stat()
+        old = previous.get(relative.as_posix())
+        if old and old['bytes'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+            files[relative.as_posix()] = old
+        else:
+            to_scan.append(str(path))
+
+    workers = min(workers or audit_config.get('workers') or os.cpu_count() or 1, len(to_scan))
+    if workers <= 1:
+        scanned = map(_scan, to_scan)
+    else:
+        pool = Pool(workers)
+        scanned = pool.imap_unordered(_scan, to_scan, chunksize=max(1, len(to_scan) // (workers * 4)))
+    try:
+        for path, stats in scanned:
+            files[Path(path).relative_to(output_dir).as_posix()] = stats
+    finally:
+        if workers > 1:
+            pool.close()
+            pool.join()
+
+    industries = _report_industries(output_dir)
+    flag_counts = dict.fromkeys(FLAGS, 0)
+    for name, stats in files.items():
+        stats['industry'] = industries.get(Path(name).name)
+        stats['flags'] = flag(stats, targets)
+        for value in stats['flags']:
+            flag_counts[value] += 1
+
+    durations = [stats['duration_seconds'] for stats in files.values() if stats['frames']]
+    index = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'targets': targets,
+        'scanned': len(to_scan),
+        'unchanged': len(files) - len(to_scan),
+        'scan_seconds': round(time.monotonic() - started, 3),
+        'summary': {
+            'files': len(files),
+            'total_seconds': round(sum(durations), 1),
+            'min_seconds': min(durations) if durations else 0.0,
+            'mean_seconds': round(sum(durations) / len(durations), 1) if durations else 0.0,
+            'max_seconds': max(durations) if durations else 0.0,
+            'flagged': sum(1 for stats in files.values() if stats['flags']),
+            'flags': {name: count for name, count in flag_counts.items() if count},
+        },
+        'files': dict(sorted(files.items())),
+    }
+    _write_index(index_path, index)
+    return index
+
+
+def run_audit(config_path: str = 'config.yaml', workers: Optional[int] = None, rescan: bool = False,
+              draft: bool = False) -> Dict:
+    """Audit the output directory named in a config file (the draft one with `draft`)"""
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    if draft:
+        output_dir = config.get('tts', {}).get('draft', {}).get('output_directory', './output_draft')
+    else:
+        output_dir = config['output']['directory']
+    return audit(Path(output_dir), config, workers=workers, rescan=rescan)
+
+
+def print_audit(index: Dict):
+    """Summarise an audit and list the flagged files"""
+    summary = index['summary']
+    targets = index['targets']
+    print(f"\n🔎 Audited {summary['files']} MP3 file(s) in {index['scan_seconds']:.2f}s "
+          f"({index['scanned']} scanned, {index['unchanged']} unchanged)")
+    if summary['files']:
+        print(f"   Duration: min {summary['min_seconds']:.1f}s, mean {summary['mean_seconds']:.1f}s, "
+              f"max {summary['max_seconds']:.1f}s (target {targets['min_seconds']}-{targets['max_seconds']}s)")
+    if not summary['flagged']:
+        print("   ✅ No outliers")
+        return
+
+    counts = ', '.join(f"{name} {count}" for name, count in summary['flags'].items())
+    print(f"   ⚠️  {summary['flagged']} flagged: {counts}")
+    for name, stats in index['files'].items():
+        if stats['flags']:
+            print(f"   - {name}: {describe(stats, stats['flags'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audit generated MP3s from their frame headers')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to config file')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: audit.workers or all cores)')
+    parser.add_argument('--rescan', action='store_true', help='Scan every file, even if unchanged since the last audit')
+    parser.add_argument('--strict', action='store_true', help='Exit with status 1 when any file is flagged')
+    parser.add_argument('--draft', action='store_true', help='Audit the draft output directory (tts.draft)')
+    args = parser.parse_args()
+    
+    index = run_audit(args.config, workers=args.workers, rescan=args.rescan, draft=args.draft)
+    print_audit(index)
+    if args.strict and index['summary']['flagged']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
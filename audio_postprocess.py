@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Segment post-processing between synthesis and splicing
+Measures each segment's loudness, levels segments to a common target and trims
+silent lead-in and tail frames, so turns keep a steady level and the gaps
+inserted by the splicer are the only pauses between them. Works on MP3 frames
+directly: gain is applied through each granule's global_gain and trimming
+drops whole frames, so nothing is decoded or re-encoded. ffmpeg, when
+installed, is used only to measure loudness in LUFS.
+"""
+
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from mp3_tools import (GAIN_STEP_DB, FrameHeader, adjust_gain, id3v2_size, is_info_frame, iter_frames,
+                       main_data_size, side_info, trailing_tags_size)
+
+# Integrated loudness line of ffmpeg's ebur128 summary
+EBUR128_INTEGRATED = re.compile(r'I:\s+(-?\d+(?:\.\d+)?) LUFS')
+
+# ebur128 reports this (the gate floor) for segments too short or quiet to measure
+LUFS_FLOOR = -70.0
+
+
+def _audio_frames(data) -> List[Tuple[int, FrameHeader]]:
+    """(offset, header) of every audio frame, without tags or the Info frame"""
+    start = id3v2_size(data[:10])
+    end = len(data) - trailing_tags_size(data)
+    frames = list(iter_frames(data, start, end))
+    if frames and is_info_frame(data, *frames[0]):
+        frames = frames[1:]
+    return frames
+
+
+def _frame_level(data, offset: int, header: FrameHeader) -> Tuple[float, List[float]]:
+    """Level of a frame (its loudest granule) and of each granule holding data, in dB"""
+    levels = [(granule.global_gain - 210) * GAIN_STEP_DB
+              for granule in side_info(data, offset, header)[1] if granule.part2_3_length]
+    return (max(levels) if levels else -math.inf), levels
+
+
+def ffmpeg_loudness(path: str) -> Optional[float]:
+    """Integrated loudness in LUFS measured by ffmpeg, or None if it cannot be measured"""
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-nostats', '-hide_banner', '-i', path, '-af', 'ebur128=framelog=quiet', '-f', 'null', '-'],
+            capture_output=True, text=True, timeout=60,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    matches = EBUR128_INTEGRATED.findall(result.stderr)
+    if result.returncode or not matches or float(matches[-1]) <= LUFS_FLOOR:
+        return None
+    return float(matches[-1])
+
+
+def use_ffmpeg(options: Dict) -> bool:
+    """Whether loudness is measured with ffmpeg under the `decoder` option"""
+    decoder = options.get('decoder', 'auto')
+    if decoder == 'none':
+        return False
+    available = shutil.which('ffmpeg') is not None
+    if decoder == 'ffmpeg' and not available:
+        raise RuntimeError("postprocess.decoder is 'ffmpeg' but ffmpeg is not installed")
+    return available
+
+
+def analyze_segment(path: str, options: Dict) -> Dict:
+    """Loudness and speech boundaries of one segment (runs in a worker process)
+
+    Without a decoder, loudness is estimated from global_gain, the quantizer
+    step the encoder chose for each granule. It tracks the signal level
+    closely for one encoder and bitrate, but is only meaningful relative to
+    other segments in the same format. Frames more than
+    `silence_threshold_db` below the segment's loud level (its 95th
+    percentile) count as silence, and they also gate the loudness estimate.
+    """
+    data = Path(path).read_bytes()
+    frames = _audio_frames(data)
+    levels = []
+    granule_levels = []
+    for offset, header in frames:
+        level, granules = _frame_level(data, offset, header)
+        levels.append(level)
+        granule_levels.append(granules)
+
+    audible = sorted(level for level in levels if level > -math.inf)
+    if not audible:
+        return {'frames': len(frames), 'first': 0, 'end': len(frames), 'estimate_db': None, 'lufs': None}
+
+    reference = audible[min(len(audible) - 1, int(len(audible) * 0.95))]
+    gate = reference - options.get('silence_threshold_db', 30)
+    speech = [index for index, level in enumerate(levels) if level >= gate]
+
+    # Energy mean of the gated granules, as loudness meters average power
+    gated = [level for index in speech for level in granule_levels[index] if level >= gate]
+    estimate = 10 * math.log10(sum(10 ** (level / 10) for level in gated) / len(gated))
+
+    return {
+        'frames': len(frames),
+        'first': speech[0],
+        'end': speech[-1] + 1,
+        'estimate_db': round(estimate, 2),
+        'lufs': ffmpeg_loudness(path) if options.get('use_ffmpeg') else None,
+    }
+
+
+def rewrite_segment(path: str, gain_db: float, first: int, end: int, options: Dict) -> Dict:
+    """Apply gain and keep frames [first, end) plus padding (runs in a worker process)
+    
+    `edge_padding_seconds` of the trimmed silence is kept at each end so
+    word onsets and releases are not clipped. Leading frames are also kept
+    while the first one still draws on their bit reservoir; otherwise the
+    decoder would have to drop it. The result replaces `path` through a
+    rename, never writing into the existing file: segments are hard-linked
+    to segment cache entries, which must keep the unprocessed audio.
+    """
+    data = Path(path).read_bytes()
+    frames = _audio_frames(data)
+    if not frames:
+        return {'gain_db': 0.0, 'trimmed_seconds': 0.0}
+
+    header = frames[0][1]
+    frame_seconds = header.samples / header.sample_rate
+    padding = int(round(options.get('edge_padding_seconds', 0.05) / frame_seconds))
+    start = max(0, first - padding)
+    stop = min(len(frames), end + padding)
+
+    reservoir = side_info(data, *frames[start])[0]
+    while start > 0 and reservoir > 0:
+        start -= 1
+        reservoir -= main_data_size(frames[start][1])
+
+    steps = int(round(gain_db / GAIN_STEP_DB))
+    trimmed_seconds = round((len(frames) - (stop - start)) * frame_seconds, 3)
+    if not steps and not trimmed_seconds:
+        return {'gain_db': 0.0, 'trimmed_seconds': 0.0}
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for offset, frame_header in frames[start:stop]:
+                frame = bytearray(data[offset:offset + frame_header.length])
+                adjust_gain(frame, frame_header, steps)
+                f.write(frame)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return {'gain_db': round(steps * GAIN_STEP_DB, 2), 'trimmed_seconds': trimmed_seconds}
+
+
+def segment_gains(analyses: List[Dict], options: Dict) -> List[float]:
+    """Gain in dB that brings each segment to the target level
+
+    When every segment was measured by ffmpeg the target is `target_lufs`;
+    header estimates are relative, so segments are instead matched to the
+    median level of the set (the demo being assembled). Gains are capped at
+    `max_gain_db` either way.
+    """
+    limit = options.get('max_gain_db', 12)
+    if all(analysis['lufs'] is not None for analysis in analyses):
+        levels = [analysis['lufs'] for analysis in analyses]
+        target = options.get('target_lufs', -16)
+    else:
+        levels = [analysis['estimate_db'] for analysis in analyses]
+        known = sorted(level for level in levels if level is not None)
+        target = known[len(known) // 2] if known else None
+
+    gains = []
+    for level in levels:
+        if level is None or target is None:
+            gains.append(0.0)
+        else:
+            gains.append(max(-limit, min(limit, target - level)))
+    return gains
@@ -1,73 +1,210 @@
 #!/usr/bin/env python3
 """
 Batch generator helper - Generate voice demos in batches of 10
+Runs any range of batches (or the whole catalogue) inside one process, optionally
+sharded across worker processes that share the TTS segment cache and run manifest
 """
 
+import argparse
 import json
-import subprocess
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
 
 def load_industries():
     """Load industries from JSON file"""
     with open('industries.json', 'r') as f:
         return json.load(f)
 
-def generate_batch(batch_number, batch_size=10):
-    """Generate a specific batch of industries"""
-    industries = load_industries()
+def parse_batch_spec(spec: str, total_batches: int) -> List[int]:
+    """Turn '3', '2-5' or '1,4,7' into a list of batch numbers, each listed once in the order given"""
+    batches = []
+    for part in spec.split(','):
+        part = part.strip()
+        if '-' in part:
+            first, last = (int(x) for x in part.split('-', 1))
+            if first > last:
+                raise ValueError(f"Batch range {part} is empty (the first batch is after the last)")
+            batches.extend(range(first, last + 1))
+        else:
+            batches.append(int(part))
+    # A batch listed twice would be generated twice, possibly at once in different workers
+    batches = list(dict.fromkeys(batches))
     
+    for batch_number in batches:
+        if batch_number < 1:
+            raise ValueError("Batch number must be 1 or greater")
+        if batch_number > total_batches:
+            raise ValueError(f"Batch {batch_number} is out of range. Total batches: {total_batches}")
+    return batches
+
+def batch_industries(industries: List[str], batch_number: int, batch_size: int = 10) -> List[str]:
+    """Industries belonging to one batch"""
     start_idx = (batch_number - 1) * batch_size
-    end_idx = min(start_idx + batch_size, len(industries))
-    
-    if start_idx >= len(industries):
-        print(f"❌ Batch {batch_number} is out of range. Total industries: {len(industries)}")
-        return False
-    
-    batch_industries = industries[start_idx:end_idx]
-    
+    return industries[start_idx:start_idx + batch_size]
+
+def print_batch(industries: List[str], batch_number: int, batch_size: int = 10):
+    """Print the industries in a batch"""
+    start_idx = (batch_number - 1) * batch_size
+    batch = batch_industries(industries, batch_number, batch_size)
+
     print(f"\n{'='*60}")
-    print(f"BATCH {batch_number}: Industries {start_idx + 1} to {end_idx}")
+    print(f"BATCH {batch_number}: Industries {start_idx + 1} to {start_idx + len(batch)}")
     print(f"{'='*60}")
-    for i, industry in enumerate(batch_industries, start=start_idx + 1):
+    for i, industry in enumerate(batch, start=start_idx + 1):
         print(f"{i}. {industry}")
     print(f"{'='*60}\n")
-    
-    # Build command
-    industries_str = ','.join(batch_industries)
-    cmd = ['python3', 'generate_conversations.py', '--industries', industries_str]
-    
-    # Run generation
-    result = subprocess.run(cmd)
-    
-    return result.returncode == 0
+
+def create_generator(options: Dict):
+    """Build one generator for this process and apply command line overrides"""
+    from generate_conversations import VoiceDemoGenerator
+
+    generator = VoiceDemoGenerator(config_path=options['config'], offline=options.get('offline', False))
+    if options.get('no_cache'):
+        generator.segment_cache.enabled = False
+    if options.get('concurrency'):
+        generator.config['processing']['concurrency'] = options['concurrency']
+
+    # Worker processes split the provider quotas between them
+    workers = options.get('workers', 1)
+    if workers > 1:
+        for limits in generator.config.get('rate_limits', {}).values():
+            for key, value in limits.items():
+                # None means unlimited
+                if value is not None:
+                    limits[key] = value / workers
+        generator.openai_limiter, generator.elevenlabs_limiter = generator._create_rate_limiters()
+    return generator
+
+def run_shard(industries: List[str], options: Dict) -> Dict:
+    """Generate a list of industries with a single generator (runs in a worker process)"""
+    generator = create_generator(options)
+    return generator.run(industries=industries, resume=options.get('resume', False),
+                         batch=options.get('batch_api', False), changed_only=options.get('changed_only', False))
+
+def combine_results(shard_results: List[Dict]) -> Dict:
+    """Merge the results of several runs into one summary"""
+    combined = {'success': [], 'failed': [], 'skipped': [], 'total': 0, 'cache': {'hits': 0, 'misses': 0},
+                'estimated_cost_usd': 0.0}
+    for results in shard_results:
+        combined['success'].extend(results['success'])
+        combined['failed'].extend(results['failed'])
+        combined['skipped'].extend(results['skipped'])
+        combined['total'] += results['total']
+        combined['cache']['hits'] += results['cache']['hits']
+        combined['cache']['misses'] += results['cache']['misses']
+        combined['estimated_cost_usd'] += results['metrics']['estimated_cost_usd']['total']
+    return combined
+
+def generate_batches(batch_numbers: List[int], options: Dict, batch_size: int = 10,
+                     workers: int = 1) -> Dict:
+    """Generate the given batches in this process or across worker processes"""
+    industries = load_industries()
+    for batch_number in batch_numbers:
+        print_batch(industries, batch_number, batch_size)
+
+    if workers <= 1:
+        # One generator and one set of API clients for every batch
+        generator = create_generator(options)
+        return combine_results([
+            generator.run(industries=batch_industries(industries, batch_number, batch_size),
+                          resume=options.get('resume', False), batch=options.get('batch_api', False),
+                          changed_only=options.get('changed_only', False))
+            for batch_number in batch_numbers
+        ])
+
+    # Interleave industries so every shard gets a similar amount of work
+    selected = [industry for batch_number in batch_numbers
+                for industry in batch_industries(industries, batch_number, batch_size)]
+    shards = [selected[i::workers] for i in range(workers) if selected[i::workers]]
+
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        return combine_results(list(executor.map(run_shard, shards, [options] * len(shards))))
+
+def print_summary(results: Dict, elapsed: float):
+    """Print the combined summary for all batches"""
+    print("\n" + "="*60)
+    print("BATCH SUMMARY")
+    print("="*60)
+    print(f"Total industries: {results['total']}")
+    print(f"Successfully generated: {len(results['success'])}")
+    print(f"Failed: {len(results['failed'])}")
+    print(f"Skipped (already complete or unchanged): {len(results['skipped'])}")
+    print(f"TTS cache hits: {results['cache']['hits']}, misses: {results['cache']['misses']}")
+    print(f"Estimated cost: ${results['estimated_cost_usd']:.2f}")
+    print(f"Elapsed: {elapsed / 60:.1f} min")
+
+    if results['failed']:
+        print("\nFailed industries:")
+        for industry in results['failed']:
+            print(f"  - {industry}")
+    print("="*60)
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 batch_generate.py <batch_number>")
-        print("\nExamples:")
-        print("  python3 batch_generate.py 1    # Generate batch 1 (industries 1-10)")
-        print("  python3 batch_generate.py 2    # Generate batch 2 (industries 11-20)")
-        print("  python3 batch_generate.py 9    # Generate batch 9 (industries 81-89)")
-        print("\nTotal batches needed: 9 (89 industries / 10 per batch)")
+    total_batches_hint = "Total batches needed: 9 (89 industries / 10 per batch)"
+    parser = argparse.ArgumentParser(
+        description='Generate voice demos in batches',
+        epilog="Examples:\n"
+               "  python3 batch_generate.py 1            # Generate batch 1 (industries 1-10)\n"
+               "  python3 batch_generate.py 2-4          # Generate batches 2 to 4 in one process\n"
+               "  python3 batch_generate.py --all -w 3   # Whole catalogue across 3 worker processes\n\n"
+               + total_batches_hint,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('batches', nargs='?', help="Batch number, range or list (e.g. 3, 2-5, 1,4,7)")
+    parser.add_argument('--all', action='store_true', help='Generate every batch')
+    parser.add_argument('--batch-size', type=int, default=10, help='Industries per batch (default: 10)')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='Worker processes to shard across')
+    parser.add_argument('--concurrency', type=int, help='Industries in flight per worker (async mode)')
+    parser.add_argument('--resume', action='store_true', help='Skip industries that are already complete')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the TTS segment cache')
+    parser.add_argument('--batch-api', action='store_true', help='Generate scripts with the OpenAI Batch API')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='Regenerate only scripts or audio whose recorded inputs changed')
+    parser.add_argument('--audit', action='store_true',
+                        help='Audit the output MP3s (duration, bitrate, truncation) when the batches finish')
+    parser.add_argument('--offline', action='store_true',
+                        help='Use template scripts and draft audio, calling no API (for previews and CI)')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to config file')
+    args = parser.parse_args()
+
+    if not args.batches and not args.all:
+        parser.print_help()
         sys.exit(1)
-    
+
+    total_batches = -(-len(load_industries()) // args.batch_size)
     try:
-        batch_number = int(sys.argv[1])
-        if batch_number < 1:
-            print("❌ Batch number must be 1 or greater")
-            sys.exit(1)
-        
-        success = generate_batch(batch_number)
-        
-        if success:
-            print(f"\n✅ Batch {batch_number} completed successfully!")
-        else:
-            print(f"\n❌ Batch {batch_number} failed")
-            sys.exit(1)
-            
-    except ValueError:
-        print("❌ Batch number must be an integer")
+        batch_numbers = (list(range(1, total_batches + 1)) if args.all
+                         else parse_batch_spec(args.batches, total_batches))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    options = {
+        'config': args.config,
+        'concurrency': args.concurrency,
+        'resume': args.resume,
+        'no_cache': args.no_cache,
+        'batch_api': args.batch_api,
+        'changed_only': args.changed_only,
+        'workers': args.workers,
+        'offline': args.offline,
+    }
+
+    start = time.monotonic()
+    results = generate_batches(batch_numbers, options, batch_size=args.batch_size, workers=args.workers)
+    print_summary(results, time.monotonic() - start)
+
+    if args.audit:
+        from audio_audit import print_audit, run_audit
+        print_audit(run_audit(args.config, draft=args.offline))
+
+    label = ', '.join(str(n) for n in batch_numbers)
+    if results['failed']:
+        print(f"\n❌ Batch(es) {label} finished with {len(results['failed'])} failure(s)")
         sys.exit(1)
+    print(f"\n✅ Batch(es) {label} completed successfully!")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the voice demo pipeline
+Drives VoiceDemoGenerator against the local stand-in servers in mock_servers.py
+and reports industries/minute, per-stage latency percentiles and peak RSS
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from queue import Empty
+from typing import Dict, List
+
+import yaml
+
+from mock_servers import MockSettings, start_server
+
+# name -> (concurrency, keep the segment cache from the previous scenario)
+SCENARIOS = {
+    'serial': (1, False),
+    'concurrent': (8, False),
+    'warm-cache': (8, True),
+}
+
+
+def run_scenario(config_path: str, industries: List[str], environment: Dict[str, str], seed: int, queue):
+    """Run one generation in a fresh process and report its measurements"""
+    import random
+    os.environ.update(environment)
+    random.seed(seed)
+
+    from generate_conversations import VoiceDemoGenerator
+
+    generator = VoiceDemoGenerator(config_path=config_path)
+
+    started = time.monotonic()
+    results = generator.run(industries=industries)
+    wall = time.monotonic() - started
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        peak_rss *= 1024
+
+    queue.put({
+        'wall_seconds': wall,
+        'succeeded': len(results['success']),
+        'failed': len(results['failed']),
+        'cache': results['cache'],
+        'rate_limits': results['rate_limits'],
+        'metrics': results['metrics'],
+        'connections': results['connections'],
+        'peak_rss_bytes': peak_rss,
+    })
+
+
+def _wait_for_result(process, queue) -> Dict:
+    """Collect a scenario's measurements, failing if its process dies first"""
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"Scenario process exited with code {process.exitcode}")
+
+
+def write_config(base_config: str, workdir: Path, name: str, concurrency: int) -> Path:
+    """Derive a scenario config that writes into the benchmark's work directory"""
+    with open(base_config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    config['output']['directory'] = str(workdir / name)
+    config.setdefault('cache', {})['directory'] = str(workdir / 'tts_cache')
+    config['logging'] = {'level': 'WARNING', 'file': None, 'console': False}
+    config['processing']['concurrency'] = concurrency
+
+    # Quotas are the mock server's job; keep the client-side limiter out of the way
+    config['rate_limits'] = {
+        'openai': {'requests_per_minute': 100000, 'tokens_per_minute': None},
+        'elevenlabs': {'requests_per_minute': 100000, 'characters_per_minute': None},
+    }
+
+    path = workdir / f"{name}.yaml"
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f)
+    return path
+
+
+def summarize(name: str, measurement: Dict, industries: int) -> Dict:
+    """Turn raw measurements into the reported figures"""
+    stages = measurement['metrics']['stages']
+    summary = {
+        'scenario': name,
+        'industries': industries,
+        'succeeded': measurement['succeeded'],
+        'failed': measurement['failed'],
+        'wall_seconds': round(measurement['wall_seconds'], 3),
+        'industries_per_minute': round(industries / measurement['wall_seconds'] * 60, 2),
+        'peak_rss_mb': round(measurement['peak_rss_bytes'] / (1024 * 1024), 1),
+        'cache_hit_rate': measurement['cache']['hit_rate'],
+        'retries': {provider: stats['retries'] for provider, stats in measurement['rate_limits'].items()},
+        'connections_opened': sum(host['connections_opened'] for host in measurement['connections'].values()),
+    }
+    for stage in ('script', 'tts', 'tts_line'):
+        summary[f"{stage}_p50_ms"] = stages.get(stage, {}).get('p50_ms', 0.0)
+        summary[f"{stage}_p95_ms"] = stages.get(stage, {}).get('p95_ms', 0.0)
+    return summary
+
+
+def print_table(summaries: List[Dict]):
+    """Print the results as a fixed-width table"""
+    columns = [
+        ('scenario', 'Scenario', 12), ('industries_per_minute', 'Ind/min', 9), ('wall_seconds', 'Wall s', 8),
+        ('script_p50_ms', 'Script p50', 11), ('script_p95_ms', 'p95', 8),
+        ('tts_p50_ms', 'TTS p50', 10), ('tts_p95_ms', 'p95', 8),
+        ('tts_line_p50_ms', 'Line p50', 9), ('tts_line_p95_ms', 'p95', 8),
+        ('peak_rss_mb', 'RSS MB', 7), ('cache_hit_rate', 'Cache', 6),
+    ]
+    print("  ".join(title.rjust(width) for _, title, width in columns))
+    for summary in summaries:
+        print("  ".join(str(summary[key]).rjust(width) for key, _, width in columns))
+
+
+def main():
+    """Run the benchmark scenarios"""
+    parser = argparse.ArgumentParser(description='Benchmark the generation pipeline against local mock APIs')
+    parser.add_argument('--industries', type=int, default=10, help='Number of industries per scenario')
+    parser.add_argument('--scenarios', type=str, default=','.join(SCENARIOS),
+                        help=f"Comma-separated scenarios ({', '.join(SCENARIOS)})")
+    parser.add_argument('--concurrency', type=int, help='Override the concurrency of concurrent scenarios')
+    parser.add_argument('--latency', type=float, default=0.2, help='Mock base latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Mock latency jitter in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Mock probability of a 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Mock probability of a 429')
+    parser.add_argument('--retry-after', type=float, default=0.2, help='Retry-After sent with mock 429s')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for voices, names and mock behaviour')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Base config file')
+    parser.add_argument('--json', type=str, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',')]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    with open('industries.json', 'r') as f:
+        industries = json.load(f)[:args.industries]
+
+    server = start_server(MockSettings(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after, seed=args.seed,
+    ))
+    workdir = Path(tempfile.mkdtemp(prefix='vigyoti_bench_'))
+    context = multiprocessing.get_context('spawn')
+    summaries = []
+
+    try:
+        for name in names:
+            concurrency, warm_cache = SCENARIOS[name]
+            if args.concurrency and concurrency > 1:
+                concurrency = args.concurrency
+            if not warm_cache:
+                shutil.rmtree(workdir / 'tts_cache', ignore_errors=True)
+
+            config_path = write_config(args.config, workdir, name, concurrency)
+            queue = context.Queue()
+            process = context.Process(target=run_scenario, args=(
+                str(config_path), industries, server.environment(), args.seed, queue
+            ))
+            print(f"Running scenario '{name}' ({len(industries)} industries, concurrency {concurrency})...",
+                  file=sys.stderr)
+            process.start()
+            measurement = _wait_for_result(process, queue)
+            process.join()
+            summaries.append(summarize(name, measurement, len(industries)))
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print_table(summaries)
+    
+    # Every retry of a throttled request must wait out the Retry-After the mock server sent
+    mock_stats = server.stats.snapshot()
+    throttled = sum(mock_stats['throttled'].values())
+    early = sum(mock_stats['early_retries'].values())
+    if throttled:
+        print(f"\nThrottled requests: {throttled}, retried before Retry-After ({args.retry_after:g}s): {early}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'scenarios': summaries, 'mock_server': mock_stats}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    
+    if early:
+        print("❌ Retry-After was not honoured", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
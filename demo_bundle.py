@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Single-file demo bundle and a local server for it
+Packs every demo listed in generation_report.json (audio and script) into one
+append-only file with a compact offset index, and serves demos straight out of
+the memory-mapped bundle with Range support and sendfile()
+"""
+
+import argparse
+import errno
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import yaml
+
+from mp3_tools import scan_file
+
+logger = logging.getLogger('DemoBundle')
+
+# First bytes of every bundle
+HEADER_MAGIC = b'VGYBNDL1'
+
+# Last bytes of every bundle: magic, index offset, index length, index CRC-32
+FOOTER = struct.Struct('<8sQQI4x')
+FOOTER_MAGIC = b'VGYBIDX1'
+
+INDEX_VERSION = 1
+
+CONTENT_TYPES = {
+    'audio': 'audio/mpeg',
+    'script': 'text/plain; charset=utf-8',
+}
+
+# Audio fields copied from the frame scan into each index entry
+AUDIO_FIELDS = ('duration_seconds', 'bitrate_kbps', 'sample_rate', 'frames')
+
+# URL suffix of each kind of entry
+EXTENSIONS = {'mp3': 'audio', 'txt': 'script'}
+
+# sendfile() errors meaning the socket or file type is not supported (fall back to write)
+SENDFILE_UNSUPPORTED = (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP)
+
+# Largest single sendfile() call
+SEND_CHUNK = 8 * 1024 * 1024
+
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _locate_footer(data) -> Optional[Tuple[int, int, int]]:
+    """(index offset, index length, end of bundle) for the last complete index
+
+    The footer is normally the last thing in the file. If a repackage was
+    interrupted after appending blobs, the newest valid footer is searched for
+    instead, so the bundle stays readable and the next pack truncates the
+    partial tail.
+    """
+    if len(data) < len(HEADER_MAGIC) + FOOTER.size or bytes(data[:len(HEADER_MAGIC)]) != HEADER_MAGIC:
+        return None
+
+    end = len(data)
+    while end >= len(HEADER_MAGIC) + FOOTER.size:
+        magic, offset, length, crc = FOOTER.unpack_from(data, end - FOOTER.size)
+        footer_start = end - FOOTER.size
+        if (magic == FOOTER_MAGIC and offset + length == footer_start and offset >= len(HEADER_MAGIC)
+                and zlib.crc32(data[offset:footer_start]) == crc):
+            return offset, length, end
+        found = data.rfind(FOOTER_MAGIC, len(HEADER_MAGIC), footer_start + len(FOOTER_MAGIC) - 1)
+        if found < 0:
+            return None
+        end = found + FOOTER.size
+    return None
+
+
+def read_index(path: Path) -> Tuple[Dict, int]:
+    """Load a bundle's index and the length of its valid contents"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        located = _locate_footer(data)
+        if located is None:
+            raise ValueError(f"{path} is not a demo bundle")
+        offset, length, end = located
+        return json.loads(data[offset:offset + length]), end
+
+
+def _file_sha256(path: Path) -> str:
+    """Content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _report_sources(report_path: Path) -> Dict[str, Dict]:
+    """Slug -> industry and source files for every successful demo in the report"""
+    with open(report_path, 'r') as f:
+        report = json.load(f)
+
+    sources = {}
+    for item in report.get('success', []):
+        files = {}
+        for kind, key in (('audio', 'audio_file'), ('script', 'script_file')):
+            path = Path(item[key])
+            if not path.exists():
+                # Report paths are relative to where the generator ran
+                path = report_path.parent / path.name
+            files[kind] = path
+        slug = files['script'].name.rsplit('_script', 1)[0]
+        sources[slug] = {'industry': item['industry'], 'files': files}
+    return sources
+
+
+def _manifest_metadata(output_dir: Path) -> Dict[str, Dict]:
+    """Industry -> voices, cost and generation time recorded in the run manifest (if any)"""
+    try:
+        with open(output_dir / 'run_manifest.json', 'r') as f:
+            entries = json.load(f).get('industries', {})
+    except FileNotFoundError:
+        return {}
+
+    metadata = {}
+    for industry, entry in entries.items():
+        inputs = entry.get('inputs') or {}
+        metrics = entry.get('metrics') or {}
+        values = {
+            'customer_voice_id': inputs.get('customer_voice_id'),
+            'receptionist_voice_id': inputs.get('receptionist_voice_id'),
+            'customer_name': inputs.get('customer_name'),
+            'estimated_cost_usd': (metrics.get('estimated_cost_usd') or {}).get('total'),
+            'generated_at': entry.get('updated_at'),
+        }
+        metadata[industry] = {key: value for key, value in values.items() if value is not None}
+    return metadata
+
+
+def pack(report_path: Path, bundle_path: Path, compact: bool = False) -> Dict:
+    """Write or update the bundle from a generation report
+
+    Blobs are only ever appended: an unchanged file (same size and mtime, or
+    same content hash) keeps its existing blob, and only new or changed files
+    are written after the current contents, followed by a fresh index and
+    footer. Superseded blobs and indexes stay behind as dead space until
+    `compact` rewrites the bundle with live blobs only.
+    """
+    sources = _report_sources(report_path)
+    metadata = _manifest_metadata(report_path.parent)
+
+    previous: Dict[str, Dict] = {}
+    valid_end = 0
+    if bundle_path.exists() and not compact:
+        try:
+            index, valid_end = read_index(bundle_path)
+            previous = index.get('entries', {})
+        except ValueError:
+            logger.warning(f"{bundle_path} is not a readable bundle, rebuilding it")
+
+    # Blobs already in the bundle, by content hash
+    blobs = {blob['sha256']: blob for entry in previous.values() for blob in entry['blobs'].values()}
+
+    stats = {'entries': 0, 'appended': 0, 'reused': 0, 'appended_bytes': 0, 'missing': []}
+    tmp_path = None
+    if valid_end:
+        f = open(bundle_path, 'r+b')
+        f.truncate(valid_end)  # Drop a partial tail left by an interrupted pack
+        f.seek(valid_end)
+    else:
+        fd, tmp_path = tempfile.mkstemp(dir=bundle_path.parent, suffix='.tmp')
+        f = os.fdopen(fd, 'w+b')
+        f.write(HEADER_MAGIC)
+        blobs = {}
+
+    try:
+        entries = {}
+        for slug, source in sources.items():
+            old = previous.get(slug, {})
+            entry = {'industry': source['industry'], 'blobs': {}}
+            for kind, path in source['files'].items():
+                if not path.exists():
+                    stats['missing'].append(str(path))
+                    continue
+                stat = path.stat()
+                old_blob = old.get('blobs', {}).get(kind)
+                if (old_blob and old_blob['source_size'] == stat.st_size
+                        and old_blob['source_mtime_ns'] == stat.st_mtime_ns and old_blob['sha256'] in blobs):
+                    sha256 = old_blob['sha256']
+                else:
+                    sha256 = _file_sha256(path)
+
+                blob = blobs.get(sha256)
+                if blob is None:
+                    offset = f.tell()
+                    with open(path, 'rb') as src:
+                        shutil.copyfileobj(src, f, 1024 * 1024)
+                    blob = {'offset': offset, 'length': f.tell() - offset, 'sha256': sha256}
+                    blobs[sha256] = blob
+                    stats['appended'] += 1
+                    stats['appended_bytes'] += blob['length']
+                else:
+                    stats['reused'] += 1
+
+                entry['blobs'][kind] = dict(blob, source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns)
+                if kind == 'audio':
+                    if old_blob and old_blob['sha256'] == sha256 and 'duration_seconds' in old:
+                        entry.update({key: old[key] for key in AUDIO_FIELDS})
+                    else:
+                        stream = scan_file(path)
+                        entry.update({key: stream[key] for key in AUDIO_FIELDS})
+            if not entry['blobs']:
+                continue
+            entry['metadata'] = metadata.get(source['industry'], {})
+            entries[slug] = entry
+
+        if not stats['appended'] and entries == previous and valid_end:
+            f.close()
+            stats['entries'] = len(entries)
+            stats['bundle_bytes'] = valid_end
+            return stats
+
+        index_bytes = json.dumps({
+            'version': INDEX_VERSION,
+            'updated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'entries': entries,
+        }, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        index_offset = f.tell()
+        f.write(index_bytes)
+        f.write(FOOTER.pack(FOOTER_MAGIC, index_offset, len(index_bytes), zlib.crc32(index_bytes)))
+        f.flush()
+        os.fsync(f.fileno())
+        stats['bundle_bytes'] = f.tell()
+        f.close()
+        if tmp_path:
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, bundle_path)
+    except BaseException:
+        f.close()
+        if tmp_path:
+            os.unlink(tmp_path)
+        raise
+
+    stats['entries'] = len(entries)
+    live = sum(blob['length'] for blob in {blob['sha256']: blob for entry in entries.values()
+                                           for blob in entry['blobs'].values()}.values())
+    stats['dead_bytes'] = max(0, stats['bundle_bytes'] - live - len(HEADER_MAGIC) - len(index_bytes) - FOOTER.size)
+    return stats
+
+
+class Bundle:
+    """A memory-mapped bundle opened for reading"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.file = open(self.path, 'rb')
+        stat = os.fstat(self.file.fileno())
+        self.identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        located = _locate_footer(self.data)
+        if located is None:
+            raise ValueError(f"{self.path} is not a demo bundle")
+        offset, length, _ = located
+        self.index_bytes = bytes(self.data[offset:offset + length])
+        self.entries = json.loads(self.index_bytes)['entries']
+
+    def blob(self, slug: str, kind: str) -> Optional[Dict]:
+        """Offset, length and hash of one entry's audio or script"""
+        return self.entries.get(slug, {}).get('blobs', {}).get(kind)
+
+
+class BundleServer(ThreadingHTTPServer):
+    """Serves one bundle, re-opening it when a repackage replaces or extends it"""
+
+    daemon_threads = True
+
+    def __init__(self, address, bundle_path: Path):
+        self.bundle_path = Path(bundle_path)
+        self._bundle = Bundle(self.bundle_path)
+        self._bundle_lock = threading.Lock()
+        super().__init__(address, BundleRequestHandler)
+
+    @property
+    def bundle(self) -> Bundle:
+        """The current bundle; requests in flight keep the one they started with"""
+        try:
+            stat = os.stat(self.bundle_path)
+        except FileNotFoundError:
+            return self._bundle
+        with self._bundle_lock:
+            if (stat.st_ino, stat.st_size, stat.st_mtime_ns) != self._bundle.identity:
+                try:
+                    self._bundle = Bundle(self.bundle_path)
+                    logger.info(f"Reloaded {self.bundle_path} ({len(self._bundle.entries)} demos)")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Keeping the previous bundle, reload failed: {str(e)}")
+            return self._bundle
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end exclusive) of a single-range Range header
+
+    Returns None to serve the whole body (no header, or one this server does
+    not handle such as multiple ranges) and raises ValueError when the range
+    cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_HEADER.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size
+    start = int(first)
+    end = min(size, int(last) + 1) if last else size
+    if start >= size or start >= end:
+        raise ValueError(header)
+    return start, end
+
+
+class BundleRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD /index.json, /demos/<slug>.mp3 and /demos/<slug>.txt"""
+
+    server_version = 'VigyotiDemoBundle/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _respond(self, send_body: bool):
+        bundle = self.server.bundle
+        path = self.path.split('?', 1)[0]
+
+        if path in ('/', '/index.json'):
+            self._send_bytes(bundle.index_bytes, 'application/json', send_body)
+            return
+
+        match = re.match(r'^/demos/([\w-]+)\.(mp3|txt)$', path)
+        blob = bundle.blob(match.group(1), EXTENSIONS[match.group(2)]) if match else None
+        if blob is None:
+            self._send_bytes(b'Not found\n', 'text/plain', send_body, status=HTTPStatus.NOT_FOUND)
+            return
+
+        etag = f'"{blob["sha256"][:32]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        size = blob['length']
+        try:
+            byte_range = parse_range(self.headers.get('Range'), size)
+        except ValueError:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if byte_range and self.headers.get('If-Range') not in (None, etag):
+            byte_range = None  # Changed since the client's partial copy
+
+        start, end = byte_range or (0, size)
+        self.send_response(HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPES[EXTENSIONS[match.group(2)]])
+        self.send_header('Content-Length', str(end - start))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'public, max-age=300')
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{size}')
+        self.end_headers()
+        if send_body:
+            self._send_blob(bundle, blob['offset'] + start, end - start)
+
+    def _send_bytes(self, body: bytes, content_type: str, send_body: bool, status=HTTPStatus.OK):
+        """Send a small in-memory response"""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_blob(self, bundle: Bundle, offset: int, count: int):
+        """Copy bundle bytes to the socket in the kernel, or from the mapping without copying"""
+        self.wfile.flush()
+        if hasattr(os, 'sendfile'):
+            try:
+                while count > 0:
+                    sent = os.sendfile(self.connection.fileno(), bundle.file.fileno(), offset,
+                                       min(count, SEND_CHUNK))
+                    if sent == 0:
+                        break
+                    offset += sent
+                    count -= sent
+                return
+            except OSError as e:
+                if e.errno not in SENDFILE_UNSUPPORTED:
+                    raise
+        with memoryview(bundle.data) as view:
+            self.wfile.write(view[offset:offset + count])
+
+
+def print_stats(stats: Dict, bundle_path: Path):
+    """Summarise a pack"""
+    print(f"📦 {bundle_path}: {stats['entries']} demos, {stats['bundle_bytes'] / 1e6:.1f} MB")
+    print(f"   Appended {stats['appended']} blob(s) ({stats['appended_bytes'] / 1e6:.1f} MB), "
+          f"reused {stats['reused']}")
+    if stats.get('dead_bytes'):
+        print(f"   Dead space: {stats['dead_bytes'] / 1e6:.2f} MB (run with --compact to reclaim)")
+    for path in stats['missing']:
+        print(f"   ⚠️  Missing: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack demos into one bundle file and serve it locally')
+    parser.add_argument('command', choices=['pack', 'serve', 'list'],
+                        help='pack: build or update the bundle, serve: run the demo server, list: show the index')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to config file')
+    parser.add_argument('--bundle', type=str, help='Bundle path (default: bundle.path in the config)')
+    parser.add_argument('--report', type=str, help='Generation report to pack (default: in the output directory)')
+    parser.add_argument('--compact', action='store_true', help='Rewrite the bundle without dead space')
+    parser.add_argument('--host', type=str, help='Address to serve on')
+    parser.add_argument('--port', type=int, help='Port to serve on')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    bundle_config = config.get('bundle', {})
+    output_dir = Path(config['output']['directory'])
+    bundle_path = Path(args.bundle or bundle_config.get('path') or output_dir / 'demos.bundle')
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    if args.command == 'pack':
+        report_path = Path(args.report) if args.report else output_dir / 'generation_report.json'
+        if not report_path.exists():
+            print(f"❌ {report_path} not found, generate demos first")
+            sys.exit(1)
+        start = time.monotonic()
+        stats = pack(report_path, bundle_path, compact=args.compact)
+        print_stats(stats, bundle_path)
+        print(f"   Took {time.monotonic() - start:.2f}s")
+        return
+
+    if not bundle_path.exists():
+        print(f"❌ {bundle_path} not found, run 'python demo_bundle.py pack' first")
+        sys.exit(1)
+
+    if args.command == 'list':
+        bundle = Bundle(bundle_path)
+        for slug, entry in sorted(bundle.entries.items()):
+            audio = entry['blobs'].get('audio', {})
+            print(f"{slug:40} {entry.get('duration_seconds', 0):7.1f}s {entry.get('bitrate_kbps', 0):4} kbps "
+                  f"{audio.get('length', 0) / 1e6:6.2f} MB")
+        return
+
+    host = args.host or bundle_config.get('host', '127.0.0.1')
+    port = args.port or bundle_config.get('port', 8765)
+    server = BundleServer((host, port), bundle_path)
+    print(f"🔊 Serving {len(server.bundle.entries)} demos from {bundle_path} on http://{host}:{port}/")
+    print("   /index.json, /demos/<slug>.mp3, /demos/<slug>.txt (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,50 +6,108 @@ Generates industry-specific AI receptionist demo conversations using ElevenLabs
 
 import os
 import json
+import asyncio
+import hashlib
 import yaml
 import random
 import re
 import logging
+import multiprocessing
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
-from elevenlabs import VoiceSettings
-from openai import OpenAI
-import time
 from tqdm import tqdm
 
+import mp3_tools
+from audio_postprocess import analyze_segment, rewrite_segment, segment_gains, use_ffmpeg
+from http_transport import create_http_client, warm_up
+from rate_limiter import ProviderRateLimiter
+from run_manifest import RunManifest
+from run_metrics import RunMetrics
+from script_templates import TemplateEngine
+from script_validation import CHARACTERS_PER_WORD, ScriptValidator, parse_turns, split_units
+from tts_backends import create_backend
+from tts_cache import SegmentCache
+
 # Load environment variables
 load_dotenv()
 
 class VoiceDemoGenerator:
     """Generate AI receptionist demo conversations for multiple industries"""
     
-    def __init__(self, config_path: str = "config.yaml"):
-        """Initialize the generator with configuration"""
+    def __init__(self, config_path: str = "config.yaml", tts_backend: Optional[str] = None, offline: bool = False):
+        """Initialize the generator with configuration
+        
+        `tts_backend` overrides `tts.backend`; `offline` renders drafts and
+        writes template scripts, so no API is called.
+        """
         self.config = self._load_config(config_path)
+        if offline:
+            self.config['openai']['enabled'] = False
+            tts_backend = tts_backend or 'draft'
+        if tts_backend:
+            self.config.setdefault('tts', {})['backend'] = tts_backend
         self.templates = self._load_templates()
+        self.template_engine = TemplateEngine(self.templates, self.config['conversation'])
+        self.script_validator = ScriptValidator(self.config.get('validation', {}),
+                                                self.config['output'].get('turn_gap_seconds', 0.5))
         self.industries = self._load_industries()
         self._setup_logging()
         
-        # Initialize ElevenLabs client
-        api_key = os.getenv("ELEVENLABS_API_KEY")
-        if not api_key:
-            raise ValueError("ELEVENLABS_API_KEY not found in environment variables")
-        
-        self.client = ElevenLabs(api_key=api_key)
+        # One pooled HTTP client shared by both SDKs, so connections are reused across requests
+        self.http_client, self.connection_stats = create_http_client(
+            self.config.get('http', {}), timeout=self.config['processing'].get('timeout', 60), logger=self.logger
+        )
         
-        # Initialize OpenAI client
-        openai_key = os.getenv("OPENAI_API_KEY")
-        if not openai_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        # The SDK clients are created on first use, so planning needs neither SDK nor API keys
+        self._client = None
+        self._openai_client = None
+        self._clients_lock = threading.Lock()
+        self._connected = False
+
+        # Shared per-provider rate limiters
+        self.openai_limiter, self.elevenlabs_limiter = self._create_rate_limiters()
         
-        self.openai_client = OpenAI(api_key=openai_key)
+        # Segments are rendered by the configured TTS backend
+        self.tts_backend = create_backend(self.config, lambda: self.client, self.script_validator)
         
-        # Create output directory
-        self.output_dir = Path(self.config['output']['directory'])
+        # Create output directory (drafts get their own, so they never stand in for real demos)
+        if self.tts_backend.remote:
+            self.output_dir = Path(self.config['output']['directory'])
+        else:
+            self.output_dir = Path(self.config['tts'].get('draft', {}).get('output_directory', './output_draft'))
         self.output_dir.mkdir(exist_ok=True)
         
+        # Per-industry outcomes, kept across runs and batches
+        self.manifest = RunManifest(self.output_dir / 'run_manifest.json')
+        
+        # Cache of synthesized segments shared across runs
+        cache_config = self.config.get('cache', {})
+        self.segment_cache = SegmentCache(
+            cache_config.get('directory', './.tts_cache'),
+            max_size_mb=cache_config.get('max_size_mb', 500),
+            enabled=cache_config.get('enabled', True)
+        )
+        
+        # Timings, usage and cost of the current run
+        self.metrics = RunMetrics(self.config.get('pricing'))
+        self.trace_file: Optional[str] = None
+        
+        # Inputs each industry's outputs were built from, recorded in the manifest
+        self._inputs: Dict[str, Dict] = {}
+        
+        # Optional segment post-processing, run in a process pool started on first use
+        postprocess = self.config.get('postprocess', {})
+        self.postprocess_options: Optional[Dict] = (
+            dict(postprocess, use_ffmpeg=use_ffmpeg(postprocess)) if postprocess.get('enabled') else None
+        )
+        self._postprocess_executor: Optional[ProcessPoolExecutor] = None
+        self._postprocess_lock = threading.Lock()
+        
         self.logger.info("VoiceDemoGenerator initialized successfully")
     
     def _load_config(self, config_path: str) -> Dict:
@@ -70,6 +128,102 @@ class VoiceDemoGenerator:
         
         return config
     
+    @property
+    def client(self):
+        """ElevenLabs SDK client (the SDK is imported on first use)"""
+        with self._clients_lock:
+            if self._client is None:
+                api_key = os.getenv("ELEVENLABS_API_KEY")
+                if not api_key:
+                    raise ValueError("ELEVENLABS_API_KEY not found in environment variables")
+                
+                from elevenlabs.client import ElevenLabs
+                self._client = ElevenLabs(api_key=api_key, base_url=self._elevenlabs_base_url(),
+                                          httpx_client=self.http_client)
+            return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    @property
+    def openai_client(self):
+        """OpenAI SDK client (the SDK is imported on first use)"""
+        with self._clients_lock:
+            if self._openai_client is None:
+                openai_key = os.getenv("OPENAI_API_KEY")
+                if not openai_key:
+                    raise ValueError("OPENAI_API_KEY not found in environment variables")
+                
+                from openai import OpenAI
+                # Retries are handled by our rate limiter, not the SDK
+                self._openai_client = OpenAI(
+                    api_key=openai_key,
+                    base_url=self._openai_base_url(),
+                    max_retries=0,
+                    http_client=self.http_client
+                )
+            return self._openai_client
+    
+    @openai_client.setter
+    def openai_client(self, client):
+        self._openai_client = client
+    
+    def _connect(self):
+        """Create the API clients in use and warm up their connections before real work starts"""
+        if self._connected:
+            return
+        # Create the clients now, so a missing API key fails before any work starts
+        hosts = {}
+        if self.tts_backend.remote:
+            _ = self.client
+            # Lines are synthesized tts_workers at a time, so open that many ElevenLabs connections
+            http_config = self.config.get('http', {})
+            hosts[self._elevenlabs_base_url()] = (http_config.get('warm_connections')
+                                                  or self.config['processing'].get('tts_workers', 4))
+        if self._openai_enabled():
+            _ = self.openai_client
+            hosts[self._openai_base_url()] = 1
+        
+        if hosts and self.config.get('http', {}).get('warm_up', True):
+            warm_up(self.http_client, hosts, self.logger)
+        self._connected = True
+    
+    def _openai_enabled(self) -> bool:
+        """Whether scripts are written by GPT-4o (templates are used otherwise)"""
+        return self.config['openai'].get('enabled', True)
+    
+    def _openai_base_url(self) -> str:
+        """OpenAI API base URL (OPENAI_BASE_URL overrides the config)"""
+        return os.getenv("OPENAI_BASE_URL") or self.config['openai'].get('base_url') or 'https://api.openai.com/v1'
+    
+    def _elevenlabs_base_url(self) -> str:
+        """ElevenLabs API host (ELEVENLABS_BASE_URL overrides the config)"""
+        base_url = os.getenv("ELEVENLABS_BASE_URL") or self.config['api'].get('base_url', 'https://api.elevenlabs.io')
+        # The SDK adds the /v1 prefix to every path itself
+        base_url = base_url.rstrip('/')
+        return base_url[:-3] if base_url.endswith('/v1') else base_url
+    
+    def _create_rate_limiters(self) -> Tuple[ProviderRateLimiter, ProviderRateLimiter]:
+        """Build the OpenAI and ElevenLabs rate limiters from config"""
+        limits = self.config.get('rate_limits', {})
+        processing = self.config['processing']
+        retry_options = {
+            'max_retries': processing.get('max_retries', 3),
+            'retry_delay': processing.get('retry_delay', 1),
+            'max_retry_delay': processing.get('max_retry_delay', 60),
+            'logger': self.logger,
+        }
+        
+        openai_limits = limits.get('openai', {})
+        elevenlabs_limits = limits.get('elevenlabs', {})
+        return (
+            ProviderRateLimiter('OpenAI', openai_limits.get('requests_per_minute', 500),
+                                openai_limits.get('tokens_per_minute'), **retry_options),
+            ProviderRateLimiter('ElevenLabs', elevenlabs_limits.get('requests_per_minute', 120),
+                                elevenlabs_limits.get('characters_per_minute'), **retry_options),
+        )
+    
     def _load_templates(self) -> Dict:
         """Load conversation templates"""
         with open('conversation_templates.json', 'r') as f:
@@ -113,67 +267,8 @@ class VoiceDemoGenerator:
         return text.strip('-_')
     
     def _get_industry_context(self, industry: str) -> Dict:
-        """Get or generate industry-specific context"""
-        # Check if we have a predefined context
-        if industry in self.templates['industry_contexts']:
-            return self.templates['industry_contexts'][industry]
-        
-        # Generate generic context for industries not in templates
-        return self._generate_generic_context(industry)
-    
-    def _generate_generic_context(self, industry: str) -> Dict:
-        """Generate a generic context for industries without specific templates"""
-        industry_lower = industry.lower()
-        
-        # Common patterns
-        # Determine appropriate suffix based on industry type
-        # Determine appropriate suffix based on industry type
-        if any(x in industry_lower for x in ['clinic', 'doctor', 'dentist', 'chiropractor', 'medical', 'therapy']):
-            suffix = "Clinic"
-        elif any(x in industry_lower for x in ['studio', 'gym', 'yoga', 'dance', 'martial']):
-            suffix = "Studio"
-        elif any(x in industry_lower for x in ['shop', 'store', 'bakery', 'florist', 'pharmacy']):
-            suffix = "Shop"
-        elif any(x in industry_lower for x in ['restaurant', 'cafe', 'coffee', 'bar', 'pizza']):
-            suffix = ""  # Often just the name
-        elif any(x in industry_lower for x in ['school', 'academy', 'university', 'college']):
-            suffix = "Academy"
-        elif any(x in industry_lower for x in ['agency', 'firm', 'consultant']):
-            suffix = "Group"
-        else:
-            suffix = "Services"
-            
-        # Create a realistic business name
-        prefixes = ["City", "Elite", "Premier", "Advanced", "Total", "Modern", "Expert", "Quality"]
-        prefix = random.choice(prefixes)
-        
-        business_name = f"{prefix} {industry}"
-        if suffix and suffix not in industry:
-            business_name += f" {suffix}"
-            
-        # Handle singular/plural
-        if business_name.endswith("s Services"):
-            business_name = business_name[:-10] + " Services"
-            
-        service_type = industry_lower.replace(' services', '').replace(' companies', '')
-        
-        return {
-            'business_name': business_name,
-            'service_type': service_type,
-            'specific_need': f"{service_type}",
-            'service_category': industry_lower,
-            'service_list': f"consultations, appointments, and specialized {industry_lower} services",
-            'recommended_service': f"our most popular {service_type} package"
-        }
-    
-    def _fill_template(self, template: str, context: Dict) -> str:
-        """Fill template string with context values"""
-        result = template
-        for key, value in context.items():
-            placeholder = f"{{{key}}}"
-            if placeholder in result:
-                result = result.replace(placeholder, str(value))
-        return result
+        """Get or generate industry-specific context (computed once, returned as a copy)"""
+        return dict(self.template_engine.industry_context(industry))
     
     def _select_random_voices(self) -> tuple:
         """Randomly select customer and receptionist voices from pools"""
@@ -185,13 +280,17 @@ class VoiceDemoGenerator:
         
         return customer_voice, receptionist_voice
     
-    def generate_conversation_script_with_gpt(self, industry: str, receptionist_name: str) -> str:
-        """Generate a natural conversation script using GPT-4o"""
+    def _select_random_customer_name(self) -> str:
+        """Randomly select a customer name from the pool"""
+        return random.choice(self.config['conversation']['customer_names'])
+    
+    def _build_script_request(self, industry: str, receptionist_name: str, variants: int = 1,
+                              customer_name: Optional[str] = None) -> Dict:
+        """Chat-completions parameters for one industry's script (`variants` completions)"""
         context = self._get_industry_context(industry)
         conv_params = self.config['conversation']
         
-        # Randomly select a customer name from the pool
-        customer_name = random.choice(conv_params['customer_names'])
+        customer_name = customer_name or self._select_random_customer_name()
         
         # Build prompt for GPT-4o
         prompt = f"""Generate a realistic INBOUND phone conversation where a customer calls {context['business_name']} ({industry}) and the AI receptionist answers.
@@ -246,169 +345,224 @@ Customer: [dialogue]
 
 Make it sound like a REAL phone conversation, not a scripted one."""
         
+        messages = [
+            {"role": "system", "content": "You are an expert at writing natural, realistic dialogue for phone conversations. Your conversations sound authentic with filler words, pauses, and natural speech patterns."},
+            {"role": "user", "content": prompt}
+        ]
+        
+        request = {
+            'model': self.config['openai']['model'],
+            'messages': messages,
+            'temperature': self.config['openai']['temperature'],
+            'max_tokens': self.config['openai']['max_tokens']
+        }
+        if variants > 1:
+            # One prompt, several independent completions
+            request['n'] = variants
+        return request
+    
+    def generate_conversation_script_with_gpt(self, industry: str, receptionist_name: str) -> str:
+        """Generate a natural conversation script using GPT-4o"""
+        return self.generate_script_variants(industry, receptionist_name, 1)[0]
+    
+    def generate_script_variants(self, industry: str, receptionist_name: str, variants: int,
+                                 customer_name: Optional[str] = None) -> List[str]:
+        """Generate `variants` alternative scripts with a single GPT-4o request"""
+        if not self._openai_enabled():
+            return [self.generate_conversation_script_template(industry, customer_name) for _ in range(variants)]
+        request = self._build_script_request(industry, receptionist_name, variants, customer_name)
+        
+        # Rough token budget: ~4 characters per prompt token plus the completion limit for each variant
+        estimated_tokens = (sum(len(m['content']) for m in request['messages']) // 4
+                            + request['max_tokens'] * variants)
+        
+        usage = {}
         try:
-            response = self.openai_client.chat.completions.create(
-                model=self.config['openai']['model'],
-                messages=[
-                    {"role": "system", "content": "You are an expert at writing natural, realistic dialogue for phone conversations. Your conversations sound authentic with filler words, pauses, and natural speech patterns."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.config['openai']['temperature'],
-                max_tokens=self.config['openai']['max_tokens']
-            )
+            with self.metrics.span('openai_request', industry):
+                response = self.openai_limiter.call(
+                    self.openai_client.chat.completions.create,
+                    units=estimated_tokens,
+                    usage=usage,
+                    **request
+                )
             
-            script = response.choices[0].message.content.strip()
-            self.logger.debug(f"Generated GPT-4o script for {industry}")
-            return script
+            if response.usage:
+                self.metrics.add(industry, prompt_tokens=response.usage.prompt_tokens,
+                                 completion_tokens=response.usage.completion_tokens)
+            
+            choices = sorted(response.choices, key=lambda choice: choice.index)
+            scripts = [choice.message.content.strip() for choice in choices]
+            self.logger.debug(f"Generated {len(scripts)} GPT-4o script(s) for {industry}")
+            return scripts
             
         except Exception as e:
-            self.logger.error(f"Error generating GPT-4o script: {str(e)}")
-            # Fallback to template-based generation
-            return self.generate_conversation_script_template(industry)
+            # Only reached once retries are exhausted or the error is not retryable
+            return self._fallback_scripts(industry, f"{type(e).__name__}: {str(e)}", variants, customer_name)
+        finally:
+            self._record_usage(industry, usage, 'openai_requests')
+    
+    def _fallback_scripts(self, industry: str, reason: str, variants: int = 1,
+                          customer_name: Optional[str] = None) -> List[str]:
+        """Log a failed GPT-4o request and use template scripts (with the same caller) instead"""
+        self.logger.warning(f"GPT-4o script generation failed for {industry} ({reason}), "
+                            f"falling back to template script")
+        self.metrics.add(industry, fallbacks=1)
+        self.metrics.event('template_fallback', industry, error=reason[:200])
+        return [self.generate_conversation_script_template(industry, customer_name) for _ in range(variants)]
     
-    def generate_conversation_script_template(self, industry: str) -> str:
+    def generate_conversation_script_template(self, industry: str, customer_name: Optional[str] = None) -> str:
         """Generate a complete conversation script for an industry using templates (fallback)"""
-        context = self._get_industry_context(industry)
-        
-        # Add conversation parameters from config
-        conv_params = self.config['conversation']
-        context.update(conv_params)
-        
-        # Randomly select a confirmation code
-        context['confirmation_code'] = f"VIG{random.randint(1000, 9999)}"
-        
-        # Select customer's chosen appointment
-        context['selected_day'] = context['day1']
-        context['selected_time'] = context['time1']
-        
-        # Build conversation
-        conversation_parts = []
-        
-        # 1. Customer greeting
-        customer_greeting = random.choice(self.templates['greeting'])
-        conversation_parts.append(f"Customer: {self._fill_template(customer_greeting, context)}")
-        
-        # 2. Receptionist greeting
-        receptionist_greeting = random.choice(self.templates['receptionist_greeting'])
-        conversation_parts.append(f"AI Receptionist: {self._fill_template(receptionist_greeting, context)}")
-        
-        # 3. Service inquiry
-        service_inquiry = random.choice(self.templates['service_inquiry'])
-        conversation_parts.append(f"Customer: {self._fill_template(service_inquiry, context)}")
-        
-        # 4. Receptionist service response
-        service_response = random.choice(self.templates['receptionist_service_response'])
-        conversation_parts.append(f"AI Receptionist: {self._fill_template(service_response, context)}")
-        
-        # 5. Booking request
-        booking_request = random.choice(self.templates['booking_request'])
-        conversation_parts.append(f"Customer: {booking_request}")
+        return self.template_engine.render(self.template_engine.industry_context(industry),
+                                           customer_name=customer_name)
+    
+    def _resolve_voice_settings(self, voice_settings: Dict) -> Dict:
+        """Fill in defaults for every VoiceSettings field"""
+        return {
+            'stability': voice_settings.get('stability', 0.5),
+            'similarity_boost': voice_settings.get('similarity_boost', 0.75),
+            'style': voice_settings.get('style', 0.0),
+            'use_speaker_boost': voice_settings.get('use_speaker_boost', True)
+        }
+    
+    def _record_usage(self, industry: Optional[str], usage: Dict, requests_counter: str):
+        """Add a rate limiter's per-call usage to the run metrics"""
+        self.metrics.add(industry, **{requests_counter: usage.get('attempts', 0)},
+                         retries=usage.get('retries', 0),
+                         wait_seconds=usage.get('wait_seconds', 0.0),
+                         backoff_seconds=usage.get('backoff_seconds', 0.0))
+    
+    def _synthesize_line(self, text: str, voice_id: str, voice_settings: Dict, dest: Path,
+                         industry: Optional[str] = None, line: Optional[int] = None,
+                         unit: Optional[int] = None) -> Path:
+        """Synthesize a dialogue line (or one `unit` of it) to `dest`, using the segment cache when possible"""
+        with self.metrics.span('tts_line', industry, line=line, unit=unit, characters=len(text)) as span:
+            span['cached'] = self._synthesize_to(text, voice_id, voice_settings, dest, industry)
+        return dest
+    
+    def _synthesize_to(self, text: str, voice_id: str, voice_settings: Dict, dest: Path,
+                       industry: Optional[str]) -> bool:
+        """Write a line's audio to `dest`; returns True when it came from the cache"""
+        output = self.config['output']
+        model = self.config['api']['model']
+        output_format = f"mp3_{output['sample_rate']}_{output['bitrate']}"
+        settings = self._resolve_voice_settings(voice_settings)
         
-        # 6. Receptionist availability
-        availability = random.choice(self.templates['receptionist_availability'])
-        conversation_parts.append(f"AI Receptionist: {self._fill_template(availability, context)}")
+        if not self.tts_backend.cacheable:
+            self._request_segment(text, voice_id, settings, output_format, dest, industry)
+            return False
         
-        # 7. Customer selection
-        selection = random.choice(self.templates['customer_selection'])
-        conversation_parts.append(f"Customer: {self._fill_template(selection, context)}")
+        cache_key = SegmentCache.make_key(text, voice_id, model, settings, output_format,
+                                          backend=self.tts_backend.cache_name)
+        # Identical segments requested at the same time are synthesized once
+        with self.segment_cache.claim(cache_key):
+            if self.segment_cache.fetch(cache_key, dest):
+                self.metrics.add(industry, cache_hits=1)
+                return True
+            
+            self._request_segment(text, voice_id, settings, output_format, dest, industry)
+            self.segment_cache.store(cache_key, dest)
+        return False
+    
+    def _request_segment(self, text: str, voice_id: str, settings: Dict, output_format: str,
+                         dest: Path, industry: Optional[str]):
+        """Synthesize one segment with the TTS backend, writing it to `dest`"""
+        if not self.tts_backend.remote:
+            self.tts_backend.synthesize(text, voice_id, settings, output_format, dest)
+            return
         
-        # 8. Receptionist confirmation request
-        confirmation = random.choice(self.templates['receptionist_confirmation'])
-        conversation_parts.append(f"AI Receptionist: {self._fill_template(confirmation, context)}")
+        usage = {}
+        try:
+            self.elevenlabs_limiter.call(self.tts_backend.synthesize, text, voice_id, settings, output_format, dest,
+                                         units=len(text), usage=usage)
+        finally:
+            self._record_usage(industry, usage, 'tts_requests')
         
-        # 9. Customer details
-        details = random.choice(self.templates['customer_details'])
-        conversation_parts.append(f"Customer: {self._fill_template(details, context)}")
+        # ElevenLabs bills the characters of each successful request
+        self.metrics.add(industry, characters_billed=len(text))
+    
+    def _segment_units(self, turns: List) -> List[Tuple[int, int, str, str]]:
+        """Split turns into TTS units as configured per speaker: (turn index, unit index, speaker, text)"""
+        segmentation = self.config.get('segmentation', {})
+        min_characters = segmentation.get('min_unit_characters', 25)
+        return [
+            (index, unit, speaker, unit_text)
+            for index, (speaker, text) in enumerate(turns)
+            for unit, unit_text in enumerate(split_units(text, segmentation.get(speaker) or 'turn', min_characters))
+        ]
+    
+    def _prerender_recurring(self):
+        """Synthesize configured recurring sentences for every pool voice into the segment cache
         
-        # 10. Receptionist final confirmation
-        final_confirmation = random.choice(self.templates['receptionist_final_confirmation'])
-        conversation_parts.append(f"AI Receptionist: {self._fill_template(final_confirmation, context)}")
+        Only speakers that are split into sentences or phrases can reuse them.
+        Sentences already cached cost nothing, so this is cheap after the first run.
+        """
+        segmentation = self.config.get('segmentation', {})
+        if not segmentation.get('prerender', True) or not self.segment_cache.enabled or not self.tts_backend.cacheable:
+            return
         
-        # 11. Customer closing
-        customer_closing = random.choice(self.templates['customer_closing'])
-        conversation_parts.append(f"Customer: {customer_closing}")
+        voices = self.config['voices']
+        jobs = [
+            (sentence, voice['voice_id'], voices[f"{speaker}_settings"])
+            for speaker, sentences in (segmentation.get('recurring_sentences') or {}).items()
+            if segmentation.get(speaker, 'turn') != 'turn'
+            for voice in voices[f"{speaker}_pool"]
+            for sentence in sentences
+        ]
+        if not jobs:
+            return
         
-        # 12. Receptionist closing
-        receptionist_closing = random.choice(self.templates['receptionist_closing'])
-        conversation_parts.append(f"AI Receptionist: {self._fill_template(receptionist_closing, context)}")
+        tts_workers = self.config['processing'].get('tts_workers', 4)
+        with self.metrics.span('prerender', sentences=len(jobs)), \
+                tempfile.TemporaryDirectory(dir=self.output_dir, prefix=".prerender_") as prerender_dir, \
+                ThreadPoolExecutor(max_workers=tts_workers) as executor:
+            futures = [
+                executor.submit(self._synthesize_to, text, voice_id, settings,
+                                Path(prerender_dir) / f"sentence_{index:04d}.mp3", None)
+                for index, (text, voice_id, settings) in enumerate(jobs)
+            ]
+            failed = 0
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.debug(f"Pre-rendering a recurring sentence failed: {str(e)}")
+                    failed += 1
         
-        return "\n\n".join(conversation_parts)
+        if failed:
+            self.logger.warning(f"{failed} of {len(jobs)} recurring sentences could not be pre-rendered")
     
-    def generate_audio(self, script: str, industry: str, customer_voice: Dict, receptionist_voice: Dict) -> Optional[Path]:
-        """Generate audio from conversation script using ElevenLabs"""
+    def generate_audio(self, script: str, industry: str, customer_voice: Dict, receptionist_voice: Dict,
+                       variant: Optional[int] = None) -> Optional[Path]:
+        """Generate audio from conversation script using the configured TTS backend
+        
+        Lines are synthesized in parallel, each streamed to its own temp file, and
+        spliced in script order into a temp output that is renamed into place when
+        complete. Silence is inserted between turns for pacing. Each line is
+        retried on its own by the rate limiter, and lines that succeed are cached
+        even if others fail. Memory use is bounded by the chunk size.
+        Speakers configured for segmentation have their lines split into
+        sentence or phrase units, joined with a shorter gap.
+        A `variant` number is appended to the output file name.
+        """
         try:
-            # Parse the script to create dialogue format for ElevenLabs
-            lines = script.strip().split('\n\n')
-            
-            # Build the text with speaker tags for ElevenLabs
-            dialogue_text = ""
-            for line in lines:
-                if line.startswith("Customer:"):
-                    text = line.replace("Customer:", "").strip()
-                    dialogue_text += f"<voice name='customer'>{text}</voice> "
-                elif line.startswith("AI Receptionist:"):
-                    text = line.replace("AI Receptionist:", "").strip()
-                    dialogue_text += f"<voice name='receptionist'>{text}</voice> "
-            
-            # Generate audio using text-to-speech with voice switching
-            # Note: ElevenLabs doesn't support multi-voice in a single call via standard TTS
-            # We'll use their conversational AI approach or concatenate separate audio
-            
-            # For now, we'll generate a single voice version
-            # In production, you'd want to use their Conversational AI API or generate separately and merge
-            
-            customer_voice_id = customer_voice['voice_id']
-            receptionist_voice_id = receptionist_voice['voice_id']
-            
-            # Get voice settings
-            customer_settings = self.config['voices']['customer_settings']
-            receptionist_settings = self.config['voices']['receptionist_settings']
-            
-            audio_segments = []
-            
-            for line in lines:
-                if line.startswith("Customer:"):
-                    text = line.replace("Customer:", "").strip()
-                    voice_id = customer_voice_id
-                    voice_settings = customer_settings
-                elif line.startswith("AI Receptionist:"):
-                    text = line.replace("AI Receptionist:", "").strip()
-                    voice_id = receptionist_voice_id
-                    voice_settings = receptionist_settings
-                else:
-                    continue
-                
-                # Generate audio for this line
-                audio = self.client.generate(
-                    text=text,
-                    voice=voice_id,
-                    model=self.config['api']['model'],
-                    voice_settings=VoiceSettings(
-                        stability=voice_settings.get('stability', 0.5),
-                        similarity_boost=voice_settings.get('similarity_boost', 0.75),
-                        style=voice_settings.get('style', 0.0),
-                        use_speaker_boost=voice_settings.get('use_speaker_boost', True)
-                    )
-                )
-                
-                # Collect audio bytes
-                audio_bytes = b"".join(audio)
-                audio_segments.append(audio_bytes)
-                
-                # Small delay between segments for natural pacing
-                time.sleep(0.5)
+            turns = parse_turns(script)
+            units = self._voice_units(turns, customer_voice, receptionist_voice)
             
-            # Combine audio segments (simple concatenation)
-            # Note: This is a basic approach. For production, use audio processing library
-            combined_audio = b"".join(audio_segments)
-            
-            # Save to file
             slug = self._slugify(industry)
-            filename = self.config['output']['naming_convention'].format(industry_slug=slug)
+            filename = Path(self.config['output']['naming_convention'].format(industry_slug=slug))
+            if variant:
+                filename = filename.with_name(f"{filename.stem}_{variant}{filename.suffix}")
             output_path = self.output_dir / filename
             
-            with open(output_path, 'wb') as f:
-                f.write(combined_audio)
+            with tempfile.TemporaryDirectory(dir=self.output_dir, prefix=f".{slug}_segments_") as segment_dir:
+                with self.metrics.span('tts', industry, lines=len(turns), units=len(units), variant=variant):
+                    segment_paths = self._synthesize_segments(units, Path(segment_dir), industry)
+                
+                failed = sum(1 for path in segment_paths if path is None)
+                if failed:
+                    raise RuntimeError(f"{failed} of {len(units)} segment(s) failed after retries")
+                
+                self._splice(segment_paths, [unit for _, unit, _, _, _ in units], output_path, industry)
             
             self.logger.info(f"Generated audio for {industry}: {output_path}")
             return output_path
@@ -417,63 +571,1063 @@ Make it sound like a REAL phone conversation, not a scripted one."""
             self.logger.error(f"Error generating audio for {industry}: {str(e)}")
             return None
     
-    def generate_all(self, industries: Optional[List[str]] = None, limit: Optional[int] = None):
-        """Generate demos for all or specified industries"""
+    def _voice_units(self, turns: List, customer_voice: Dict, receptionist_voice: Dict) -> List[Tuple]:
+        """TTS units of a script with their voices: (turn index, unit index, text, voice id, settings)"""
+        # Each speaker has its own voice and settings
+        voices = {
+            'customer': (customer_voice['voice_id'], self.config['voices']['customer_settings']),
+            'receptionist': (receptionist_voice['voice_id'], self.config['voices']['receptionist_settings']),
+        }
+        return [(index, unit, text) + voices[speaker] for index, unit, speaker, text in self._segment_units(turns)]
+    
+    def _synthesize_segments(self, units: List[Tuple], segment_dir: Path, industry: str) -> List[Optional[Path]]:
+        """Synthesize units in parallel into `segment_dir`; failed units are None
+        
+        With post-processing enabled, each segment is analysed in the process
+        pool as soon as it is synthesized, while later ones are still in flight.
+        """
+        segment_paths: List[Optional[Path]] = [None] * len(units)
+        analyses: Dict[int, Future] = {}
+        tts_workers = self.config['processing'].get('tts_workers', 4)
+        with ThreadPoolExecutor(max_workers=tts_workers) as executor:
+            futures = {}
+            for position, (index, unit, text, voice_id, voice_settings) in enumerate(units):
+                dest = segment_dir / f"segment_{position:04d}.mp3"
+                futures[position] = executor.submit(self._synthesize_line, text, voice_id, voice_settings,
+                                                    dest, industry, index, unit)
+                if self.postprocess_options:
+                    futures[position].add_done_callback(
+                        lambda future, position=position: self._queue_analysis(future, position, analyses)
+                    )
+            
+            for position, future in futures.items():
+                try:
+                    segment_paths[position] = future.result()
+                except Exception as e:
+                    self.logger.warning(f"Line {units[position][0] + 1} failed for {industry}: {str(e)}")
+        
+        if self.postprocess_options:
+            self._postprocess(segment_paths, analyses, industry)
+        return segment_paths
+    
+    def _postprocess_pool(self) -> ProcessPoolExecutor:
+        """Worker processes for post-processing, shared by every industry in the run"""
+        with self._postprocess_lock:
+            if self._postprocess_executor is None:
+                workers = self.postprocess_options.get('workers') or os.cpu_count() or 1
+                # Spawned, not forked: this process already runs HTTP and TTS threads
+                self._postprocess_executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._postprocess_executor
+    
+    def _queue_analysis(self, future: Future, position: int, analyses: Dict[int, Future]):
+        """Done callback: start analysing a segment that was just synthesized"""
+        if not future.cancelled() and future.exception() is None:
+            analyses[position] = self._postprocess_pool().submit(
+                analyze_segment, str(future.result()), self.postprocess_options
+            )
+    
+    def _postprocess(self, segment_paths: List[Optional[Path]], analyses: Dict[int, Future], industry: str):
+        """Level and trim synthesized segments in place (see audio_postprocess)
+        
+        Gains depend on every segment's loudness, so they are applied once all
+        analyses are in; the rewrites then run in parallel as well.
+        """
+        options = self.postprocess_options
+        positions = [position for position, path in enumerate(segment_paths) if path]
+        if not positions:
+            return
+        
+        pool = self._postprocess_pool()
+        with self.metrics.span('postprocess', industry, segments=len(positions)) as record:
+            results = [
+                (analyses.get(position) or pool.submit(analyze_segment, str(segment_paths[position]), options)).result()
+                for position in positions
+            ]
+            gains = segment_gains(results, options) if options.get('normalize', True) else [0.0] * len(results)
+            rewrites = [
+                pool.submit(rewrite_segment, str(segment_paths[position]), gain,
+                            *((result['first'], result['end']) if options.get('trim_silence', True)
+                              else (0, result['frames'])), options)
+                for position, gain, result in zip(positions, gains, results)
+            ]
+            outcomes = [rewrite.result() for rewrite in rewrites]
+            
+            record['measured_by'] = 'ffmpeg' if all(result['lufs'] is not None for result in results) else 'headers'
+            record['max_gain_db'] = max(abs(outcome['gain_db']) for outcome in outcomes)
+            record['trimmed_seconds'] = round(sum(outcome['trimmed_seconds'] for outcome in outcomes), 3)
+    
+    def _splice(self, segment_paths: List[Path], unit_numbers: List[int], output_path: Path, industry: str):
+        """Join segments in order into `output_path`, which only ever appears complete
+        
+        Segments are spliced at frame level, pausing between turns and, more
+        briefly, between the units of one turn (those with a unit number above 0).
+        """
+        output = self.config['output']
+        unit_gap = self.config.get('segmentation', {}).get('unit_gap_seconds', 0.15)
+        fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, prefix=f".{output_path.stem}_", suffix='.mp3.tmp')
+        try:
+            with self.metrics.span('concatenate', industry), os.fdopen(fd, 'wb') as f:
+                concatenator = mp3_tools.Mp3Concatenator(f)
+                for position, (segment_path, unit) in enumerate(zip(segment_paths, unit_numbers)):
+                    if position:
+                        concatenator.add_silence(unit_gap if unit else output.get('turn_gap_seconds', 0.5),
+                                                 output['sample_rate'], output['bitrate'])
+                    concatenator.add_file(segment_path)
+                concatenator.finish()
+            
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, output_path)
+            tmp_path = None
+        finally:
+            if tmp_path:
+                os.remove(tmp_path)
+    
+    def _target_industries(self, industries: Optional[List[str]], limit: Optional[int]) -> List[str]:
+        """Resolve the list of industries a run should process"""
         target_industries = industries if industries else self.industries
         
         if limit:
             target_industries = target_industries[:limit]
         
+        return target_industries
+    
+    def _prepare_industry(self, industry: str,
+                          selection: Optional[Tuple[Dict, Dict, str]] = None) -> Tuple[List[str], List[Path], Dict, Dict]:
+        """Select voices, generate the script variants and save them (the OpenAI stage)
+        
+        `selection` is a (customer voice, receptionist voice, customer name) to
+        reuse instead of picking at random.
+        """
+        with self.metrics.span('script', industry):
+            if selection:
+                customer_voice, receptionist_voice, customer_name = selection
+            else:
+                # Select random voices and caller for this industry
+                customer_voice, receptionist_voice = self._select_random_voices()
+                customer_name = self._select_random_customer_name()
+            
+            # Generate scripts using GPT-4o with specific receptionist name
+            variants = self.config['openai'].get('variants', 1)
+            request = self._build_script_request(industry, receptionist_voice['name'], variants, customer_name)
+            scripts = self.generate_script_variants(industry, receptionist_voice['name'], variants, customer_name)
+            scripts = self._validate_scripts(industry, scripts, customer_voice, receptionist_voice, customer_name)
+            script_paths = self._save_scripts(industry, scripts)
+            self._record_inputs(industry, self._script_fingerprint(request), scripts, script_paths,
+                                customer_voice, receptionist_voice, customer_name)
+        
+        return scripts, script_paths, customer_voice, receptionist_voice
+    
+    def _script_fingerprint(self, request: Dict) -> str:
+        """Hash of everything a GPT script is generated from
+        
+        The request holds the full prompt (business, caller and receptionist
+        names included), model, temperature, token limit and variant count.
+        """
+        payload = json.dumps(request, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _audio_fingerprint(self, scripts: List[str], customer_voice: Dict, receptionist_voice: Dict) -> str:
+        """Hash of everything an industry's audio is rendered from"""
+        voices = self.config['voices']
+        output = self.config['output']
+        payload = json.dumps({
+            'scripts': [hashlib.sha256(script.encode('utf-8')).hexdigest() for script in scripts],
+            'customer_voice_id': customer_voice['voice_id'],
+            'receptionist_voice_id': receptionist_voice['voice_id'],
+            'customer_settings': self._resolve_voice_settings(voices['customer_settings']),
+            'receptionist_settings': self._resolve_voice_settings(voices['receptionist_settings']),
+            'model': self.config['api']['model'],
+            'output_format': f"mp3_{output['sample_rate']}_{output['bitrate']}",
+            'turn_gap_seconds': output.get('turn_gap_seconds', 0.5),
+            'segmentation': {key: value for key, value in self.config.get('segmentation', {}).items()
+                             if key not in ('prerender', 'recurring_sentences')},
+            'render_variants': self._variants_to_render(len(scripts)),
+            # Only present for other backends, so fingerprints recorded before backends existed still match
+            **({'tts_backend': self.tts_backend.cache_name} if self.tts_backend.name != 'elevenlabs' else {}),
+            # Only present when enabled, so fingerprints recorded before post-processing existed still match
+            **({'postprocess': {key: value for key, value in self.postprocess_options.items() if key != 'workers'}}
+               if self.postprocess_options else {}),
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _record_inputs(self, industry: str, script_fingerprint: str, scripts: List[str], script_paths: List[Path],
+                       customer_voice: Dict, receptionist_voice: Dict, customer_name: str):
+        """Remember what an industry's outputs are built from, for the manifest"""
+        self._inputs[industry] = {
+            'script_fingerprint': script_fingerprint,
+            'audio_fingerprint': self._audio_fingerprint(scripts, customer_voice, receptionist_voice),
+            'customer_voice_id': customer_voice['voice_id'],
+            'receptionist_voice_id': receptionist_voice['voice_id'],
+            'customer_name': customer_name,
+            'script_files': [str(path) for path in script_paths],
+        }
+    
+    def _validate_scripts(self, industry: str, scripts: List[str], customer_voice: Dict,
+                          receptionist_voice: Dict, customer_name: Optional[str] = None) -> List[str]:
+        """Check scripts before any TTS spend, regenerating the ones that fail
+        
+        Failing scripts are requested again (in one call) up to
+        validation.max_regenerations times, then replaced by template scripts.
+        Size estimates for the final scripts are added to the run metrics.
+        """
+        validation = self.config.get('validation', {})
+        voices = {'customer': customer_voice, 'receptionist': receptionist_voice}
+        scripts = list(scripts)
+        
+        if validation.get('enabled', True):
+            checks = [self.script_validator.check(script, voices) for script in scripts]
+            for _ in range(validation.get('max_regenerations', 2)):
+                failing = [index for index, check in enumerate(checks) if not check.valid]
+                if not failing:
+                    break
+                for index in failing:
+                    self.logger.warning(f"Script {index + 1} for {industry} failed validation "
+                                        f"({'; '.join(checks[index].problems)}), regenerating")
+                self.metrics.add(industry, script_regenerations=len(failing))
+                self.metrics.event('script_regenerated', industry, scripts=len(failing))
+                
+                replacements = self.generate_script_variants(industry, receptionist_voice['name'], len(failing),
+                                                             customer_name)
+                for index, script in zip(failing, replacements):
+                    scripts[index] = script
+                    checks[index] = self.script_validator.check(script, voices)
+            
+            failing = [index for index, check in enumerate(checks) if not check.valid]
+            if failing:
+                replacements = self._fallback_scripts(
+                    industry, f"still failing validation: {'; '.join(checks[failing[0]].problems)}", len(failing),
+                    customer_name
+                )
+                for index, script in zip(failing, replacements):
+                    scripts[index] = script
+        
+        self._record_estimates(industry, scripts, customer_voice, receptionist_voice)
+        return scripts
+    
+    def _record_estimates(self, industry: str, scripts: List[str], customer_voice: Dict, receptionist_voice: Dict):
+        """Add the size estimates of an industry's final scripts to the run metrics"""
+        voices = {'customer': customer_voice, 'receptionist': receptionist_voice}
+        estimates = [self.script_validator.check(script, voices).estimate for script in scripts]
+        self.metrics.annotate(industry, script_estimates=estimates)
+        self.metrics.add(industry, estimated_seconds=sum(e['estimated_seconds'] for e in estimates),
+                         estimated_characters=sum(e['billable_characters'] for e in estimates))
+    
+    def _save_scripts(self, industry: str, scripts: List[str]) -> List[Path]:
+        """Save scripts for reference, numbered from 1 when there are several variants"""
+        slug = self._slugify(industry)
+        script_paths = []
+        for number, script in enumerate(scripts, start=1):
+            suffix = f"_{number}" if len(scripts) > 1 else ""
+            script_path = self.output_dir / f"{slug}_script{suffix}.txt"
+            with open(script_path, 'w') as f:
+                f.write(script)
+            script_paths.append(script_path)
+        return script_paths
+    
+    def _variants_to_render(self, count: int) -> List[int]:
+        """Variant numbers to voice (output.render_variants is a number or 'all')"""
+        choice = self.config['output'].get('render_variants', 1)
+        if choice == 'all':
+            return list(range(1, count + 1))
+        return [min(max(int(choice), 1), count)]
+    
+    def _render_audio(self, scripts: List[str], script_paths: List[Path], industry: str,
+                      customer_voice: Dict, receptionist_voice: Dict) -> Tuple[Optional[Path], Path, List[Dict]]:
+        """Voice the selected variants (the ElevenLabs stage)
+        
+        Returns the first rendered variant's audio (None unless every selected
+        variant succeeded) and script, plus a record of every variant.
+        """
+        render = self._variants_to_render(len(scripts))
+        variants = []
+        for number, (script, script_path) in enumerate(zip(scripts, script_paths), start=1):
+            audio_path = None
+            if number in render:
+                audio_path = self.generate_audio(script, industry, customer_voice, receptionist_voice,
+                                                 variant=number if len(scripts) > 1 else None)
+            variants.append({
+                'variant': number,
+                'script_file': str(script_path),
+                'audio_file': str(audio_path) if audio_path else None,
+                'rendered': number in render,
+            })
+        
+        rendered = [variant for variant in variants if variant['rendered']]
+        complete = all(variant['audio_file'] for variant in rendered)
+        audio_path = Path(rendered[0]['audio_file']) if complete else None
+        return audio_path, script_paths[render[0] - 1], variants
+    
+    def _prepare_industries_batch(self, industries: List[str], selections: Optional[Dict[str, Tuple]] = None
+                                  ) -> Dict[str, Tuple[List[str], List[Path], Dict, Dict]]:
+        """Generate every script with one OpenAI Batch API job
+        
+        All prompts are written to one JSONL file, uploaded and submitted as a batch,
+        which is polled until it finishes. Results are mapped back to industries by
+        custom_id; industries whose request failed get a template script. If the
+        batch as a whole fails, an empty dict is returned and the industries fall
+        back to one request each. `selections` holds voices and caller names to
+        reuse, as for `_prepare_industry`.
+        """
+        if not industries:
+            return {}
+        
+        selections = selections or {}
+        variants = self.config['openai'].get('variants', 1)
+        requests = {}
+        lines = []
+        for index, industry in enumerate(industries):
+            if industry in selections:
+                customer_voice, receptionist_voice, customer_name = selections[industry]
+            else:
+                customer_voice, receptionist_voice = self._select_random_voices()
+                customer_name = self._select_random_customer_name()
+            custom_id = f"{index:04d}-{self._slugify(industry)}"
+            body = self._build_script_request(industry, receptionist_voice['name'], variants, customer_name)
+            requests[custom_id] = (industry, customer_voice, receptionist_voice, customer_name,
+                                   self._script_fingerprint(body))
+            lines.append(json.dumps({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': body
+            }))
+        
+        # Each run uploads its own scratch copy: sharded runs (batch_generate.py --workers)
+        # submit their batches at the same time
+        try:
+            with tempfile.TemporaryDirectory(dir=self.output_dir, prefix=".script_batch_") as batch_dir, \
+                    self.metrics.span('openai_batch', industries=len(industries)):
+                input_path = Path(batch_dir) / 'script_batch_input.jsonl'
+                with open(input_path, 'w') as f:
+                    f.write("\n".join(lines) + "\n")
+                outputs = self._run_script_batch(input_path)
+        except Exception as e:
+            self.logger.error(f"OpenAI batch failed ({type(e).__name__}: {str(e)}), "
+                              f"falling back to one request per industry")
+            self.metrics.event('batch_fallback', error=type(e).__name__)
+            return {}
+        
+        prepared = {}
+        for custom_id, (industry, customer_voice, receptionist_voice, customer_name, fingerprint) in requests.items():
+            with self.metrics.span('script', industry, batch=True):
+                output = outputs.get(custom_id)
+                response = (output or {}).get('response') or {}
+                body = response.get('body') or {}
+                if response.get('status_code') == 200 and body.get('choices'):
+                    choices = sorted(body['choices'], key=lambda choice: choice['index'])
+                    scripts = [choice['message']['content'].strip() for choice in choices]
+                    usage = body.get('usage') or {}
+                    self.metrics.add(industry, batch_prompt_tokens=usage.get('prompt_tokens', 0),
+                                     batch_completion_tokens=usage.get('completion_tokens', 0))
+                else:
+                    error = (output or {}).get('error') or body.get('error') or 'missing from batch output'
+                    scripts = self._fallback_scripts(industry, f"batch request failed: {error}", variants,
+                                                     customer_name)
+                scripts = self._validate_scripts(industry, scripts, customer_voice, receptionist_voice, customer_name)
+                script_paths = self._save_scripts(industry, scripts)
+                self._record_inputs(industry, fingerprint, scripts, script_paths,
+                                    customer_voice, receptionist_voice, customer_name)
+                prepared[industry] = (scripts, script_paths, customer_voice, receptionist_voice)
+        
+        return prepared
+    
+    def _run_script_batch(self, input_path: Path) -> Dict[str, Dict]:
+        """Submit a batch input file, wait for it to finish and return its output lines by custom_id"""
+        openai_config = self.config['openai']
+        poll_interval = openai_config.get('batch_poll_interval', 30)
+        timeout = openai_config.get('batch_timeout', 24 * 60 * 60)
+        
+        with open(input_path, 'rb') as f:
+            batch_file = self.openai_limiter.call(self.openai_client.files.create, file=f, purpose='batch')
+        batch = self.openai_limiter.call(
+            self.openai_client.batches.create,
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h',
+            metadata={'source': 'vigyoti_voices'}
+        )
+        self.logger.info(f"Submitted OpenAI batch {batch.id} ({input_path.name})")
+        
+        deadline = time.monotonic() + timeout
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Batch {batch.id} still {batch.status} after {timeout}s")
+            time.sleep(poll_interval)
+            batch = self.openai_limiter.call(self.openai_client.batches.retrieve, batch.id)
+            counts = batch.request_counts
+            if counts:
+                self.logger.info(f"Batch {batch.id}: {batch.status} "
+                                 f"({counts.completed}/{counts.total} done, {counts.failed} failed)")
+        
+        if batch.status == 'failed':
+            raise RuntimeError(f"Batch {batch.id} failed: {batch.errors}")
+        
+        # Expired and cancelled batches still return the requests that finished
+        outputs = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = self.openai_limiter.call(self.openai_client.files.content, file_id)
+            for line in content.text.splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    outputs[record['custom_id']] = record
+        return outputs
+    
+    def _record_result(self, results: Dict, industry: str, audio_path: Optional[Path], script_path: Optional[Path]):
+        """Add the outcome for one industry to the results"""
+        if audio_path:
+            results['success'].append({
+                'industry': industry,
+                'audio_file': str(audio_path),
+                'script_file': str(script_path)
+            })
+        else:
+            results['failed'].append(industry)
+    
+    def _update_manifest(self, industry: str, audio_path: Optional[Path], script_path: Optional[Path],
+                         variants: Optional[List[Dict]] = None):
+        """Persist the outcome for one industry as soon as it is known"""
+        entry = {
+            'status': 'success' if audio_path else 'failed',
+            'audio_file': str(audio_path) if audio_path else None,
+            'script_file': str(script_path) if script_path else None,
+        }
+        if audio_path:
+            entry['audio_bytes'] = Path(audio_path).stat().st_size
+        if variants and len(variants) > 1:
+            entry['variants'] = [
+                dict(variant, audio_bytes=Path(variant['audio_file']).stat().st_size if variant['audio_file'] else None)
+                for variant in variants
+            ]
+        entry['metrics'] = self.metrics.industry_summary(industry)
+        
+        inputs = self._inputs.pop(industry, None)
+        if inputs:
+            if entry['metrics']['usage']['fallbacks']:
+                # Template fallbacks stand in for a failed request; never treat them as up to date
+                inputs['script_fingerprint'] = None
+            entry['inputs'] = inputs
+        self.manifest.update(industry, entry)
+    
+    def _is_complete(self, industry: str, entry: Optional[Dict]) -> bool:
+        """Check that a recorded success still has a valid script and audio file"""
+        if not entry or entry.get('status') != 'success':
+            return False
+        
+        script_path = Path(entry['script_file'])
+        audio_path = Path(entry['audio_file'])
+        if not script_path.is_file() or script_path.stat().st_size == 0:
+            return False
+        if not audio_path.is_file() or audio_path.stat().st_size != entry.get('audio_bytes'):
+            return False
+        
+        with open(audio_path, 'rb') as f:
+            if not mp3_tools.looks_like_mp3(f.read(4)):
+                return False
+        
+        # Every variant that was voiced must still be in place too
+        for variant in entry.get('variants', []):
+            if not Path(variant['script_file']).is_file():
+                return False
+            if variant['rendered'] and (not variant['audio_file'] or not Path(variant['audio_file']).is_file()
+                                        or Path(variant['audio_file']).stat().st_size != variant['audio_bytes']):
+                return False
+        return True
+    
+    def _skip_completed(self, target_industries: List[str]) -> Tuple[List[str], List[str]]:
+        """Split targets into industries still to generate and ones already complete"""
+        entries = self.manifest.entries()
+        pending, skipped = [], []
+        for industry in target_industries:
+            if self._is_complete(industry, entries.get(industry)):
+                skipped.append(industry)
+            else:
+                pending.append(industry)
+        
+        if skipped:
+            self.logger.info(f"Resuming: skipping {len(skipped)} completed industries")
+        return pending, skipped
+    
+    def _recorded_selection(self, inputs: Dict) -> Tuple[Dict, Dict, str]:
+        """Voices and caller name recorded for an industry, re-picking any no longer in the pools"""
+        voices = self.config['voices']
+        customer_voice = next((voice for voice in voices['customer_pool']
+                               if voice['voice_id'] == inputs.get('customer_voice_id')), None)
+        receptionist_voice = next((voice for voice in voices['receptionist_pool']
+                                   if voice['voice_id'] == inputs.get('receptionist_voice_id')), None)
+        if customer_voice is None or receptionist_voice is None:
+            random_customer, random_receptionist = self._select_random_voices()
+            customer_voice = customer_voice or random_customer
+            receptionist_voice = receptionist_voice or random_receptionist
+        
+        customer_name = inputs.get('customer_name')
+        if customer_name not in self.config['conversation']['customer_names']:
+            customer_name = self._select_random_customer_name()
+        return customer_voice, receptionist_voice, customer_name
+    
+    def _load_scripts(self, script_files: List[str]) -> Optional[List[str]]:
+        """Read saved scripts back, or None if any is missing or empty"""
+        scripts = []
+        for script_file in script_files:
+            try:
+                with open(script_file, 'r') as f:
+                    script = f.read()
+            except OSError:
+                return None
+            if not script.strip():
+                return None
+            scripts.append(script)
+        return scripts or None
+    
+    def _plan_changes(self, target_industries: List[str]) -> Tuple[List[str], List[str], Dict, Dict]:
+        """Compare recorded input fingerprints with the current config
+        
+        Industries whose script and audio inputs are unchanged (and whose files
+        are intact) are skipped. When only audio inputs changed, such as voice
+        settings, the saved scripts are re-voiced without calling GPT. Otherwise
+        the scripts are regenerated, keeping the recorded voices and caller
+        name where they are still in the pools.
+        Returns the pending and skipped industries, the prepared scripts for
+        audio-only industries and the selections for the rest.
+        """
+        entries = self.manifest.entries()
+        variants = self.config['openai'].get('variants', 1)
+        pending, skipped, audio_only = [], [], []
+        prepared, selections = {}, {}
+        
+        for industry in target_industries:
+            entry = entries.get(industry) or {}
+            inputs = entry.get('inputs')
+            if not inputs:
+                pending.append(industry)
+                continue
+            
+            customer_voice, receptionist_voice, customer_name = self._recorded_selection(inputs)
+            request = self._build_script_request(industry, receptionist_voice['name'], variants, customer_name)
+            script_fingerprint = self._script_fingerprint(request)
+            scripts = self._load_scripts(inputs.get('script_files', []))
+            
+            if scripts is None or script_fingerprint != inputs.get('script_fingerprint'):
+                selections[industry] = (customer_voice, receptionist_voice, customer_name)
+                pending.append(industry)
+                continue
+            
+            audio_fingerprint = self._audio_fingerprint(scripts, customer_voice, receptionist_voice)
+            if audio_fingerprint == inputs.get('audio_fingerprint') and self._is_complete(industry, entry):
+                skipped.append(industry)
+                continue
+            
+            script_paths = [Path(script_file) for script_file in inputs['script_files']]
+            self._record_estimates(industry, scripts, customer_voice, receptionist_voice)
+            self._record_inputs(industry, script_fingerprint, scripts, script_paths,
+                                customer_voice, receptionist_voice, customer_name)
+            prepared[industry] = (scripts, script_paths, customer_voice, receptionist_voice)
+            audio_only.append(industry)
+            pending.append(industry)
+        
+        self.logger.info(f"Changed only: {len(skipped)} unchanged, {len(audio_only)} audio only, "
+                         f"{len(pending) - len(audio_only)} to regenerate")
+        return pending, skipped, prepared, selections
+    
+    def _plan_run(self, target_industries: List[str], resume: bool = False, changed_only: bool = False,
+                  batch: bool = False) -> Tuple[List[str], List[str], Dict, Dict]:
+        """Work out which industries to generate and prepare any scripts up front
+        
+        Returns the industries to process, the skipped ones, prepared
+        (scripts, script paths, voices) per industry and voice/caller
+        selections for the industries still needing scripts.
+        """
+        self._inputs = {}
+        skipped, prepared, selections = [], {}, {}
+        if changed_only:
+            target_industries, skipped, prepared, selections = self._plan_changes(target_industries)
+        elif resume:
+            target_industries, skipped = self._skip_completed(target_industries)
+        
+        if target_industries:
+            self._connect()
+            self._prerender_recurring()
+        
+        if batch and not self._openai_enabled():
+            self.logger.info("OpenAI is disabled, so scripts come from templates instead of the Batch API")
+        elif batch:
+            needs_scripts = [industry for industry in target_industries if industry not in prepared]
+            prepared.update(self._prepare_industries_batch(needs_scripts, selections))
+        return target_industries, skipped, prepared, selections
+    
+    def _save_report(self, results: Dict) -> Path:
+        """Write the merged report for the whole catalogue to the output directory"""
+        results['cache'] = self.segment_cache.stats()
+        results['rate_limits'] = {
+            'openai': self.openai_limiter.stats(),
+            'elevenlabs': self.elevenlabs_limiter.stats(),
+        }
+        results['connections'] = self.connection_stats.snapshot()
+        self.metrics.finish()
+        results['metrics'] = self.metrics.run_summary()
+        
+        def sections(entries: Dict[str, Dict]) -> Dict:
+            return {
+                'cache': results['cache'],
+                'rate_limits': results['rate_limits'],
+                'connections': results['connections'],
+                # Aggregates for this run, plus the latest per-industry breakdown from every run
+                'metrics': {
+                    'run': results['metrics'],
+                    'industries': {industry: entry['metrics'] for industry, entry in entries.items()
+                                   if 'metrics' in entry},
+                },
+            }
+        
+        # Sharded runs write the report from several processes, so it is built and replaced under the manifest lock
+        report_path = self.output_dir / 'generation_report.json'
+        report = self.manifest.write_report(report_path, self.industries, sections)
+        
+        if self.trace_file:
+            self.metrics.write_trace(self.trace_file)
+            self.logger.info(f"Trace written to: {self.trace_file}")
+        
+        totals = results['metrics']['totals']
+        self.logger.info(f"Generation complete! Success: {len(results['success'])}, Failed: {len(results['failed'])}")
+        self.logger.info(f"TTS cache: {results['cache']['hits']} hits, {results['cache']['misses']} misses")
+        for host, connections in results['connections'].items():
+            self.logger.info(f"Connections to {host}: {connections['connections_opened']} opened for "
+                             f"{connections['requests']} requests ({connections['reuse_rate']:.0%} reused)")
+        tokens = sum(totals[key] for key in ('prompt_tokens', 'completion_tokens',
+                                             'batch_prompt_tokens', 'batch_completion_tokens'))
+        self.logger.info(f"Usage: {tokens} tokens, "
+                         f"{totals['characters_billed']} characters, {totals['retries']} retries, "
+                         f"estimated cost ${results['metrics']['estimated_cost_usd']['total']:.2f}")
+        self.logger.info(f"Report saved to: {report_path} "
+                         f"({len(report['success'])}/{report['total']} industries complete)")
+        return report_path
+    
+    def generate_all(self, industries: Optional[List[str]] = None, limit: Optional[int] = None,
+                     resume: bool = False, batch: bool = False, changed_only: bool = False):
+        """Generate demos for all or specified industries
+        
+        Scripts come from the Batch API with `batch`; `changed_only` regenerates
+        only outputs whose recorded inputs changed.
+        """
+        target_industries = self._target_industries(industries, limit)
+        self.metrics = RunMetrics(self.config.get('pricing'))
+        
         results = {
             'success': [],
             'failed': [],
+            'skipped': [],
             'total': len(target_industries)
         }
         
+        target_industries, results['skipped'], prepared, selections = self._plan_run(
+            target_industries, resume, changed_only, batch
+        )
+        
         self.logger.info(f"Starting generation for {len(target_industries)} industries")
         
         # Process with progress bar
         for industry in tqdm(target_industries, desc="Generating demos"):
             try:
-                # Select random voices for this industry
-                customer_voice, receptionist_voice = self._select_random_voices()
-                
-                # Generate script using GPT-4o with specific receptionist name
-                script = self.generate_conversation_script_with_gpt(industry, receptionist_voice['name'])
+                with self.metrics.span('industry', industry):
+                    scripts, script_paths, customer_voice, receptionist_voice = (
+                        prepared.get(industry) or self._prepare_industry(industry, selections.get(industry))
+                    )
+                    
+                    # Generate audio with selected voices
+                    audio_path, script_path, variants = self._render_audio(
+                        scripts, script_paths, industry, customer_voice, receptionist_voice
+                    )
+                self._record_result(results, industry, audio_path, script_path)
+                self._update_manifest(industry, audio_path, script_path, variants)
                 
-                # Save script for reference
-                script_path = self.output_dir / f"{self._slugify(industry)}_script.txt"
+            except Exception as e:
+                self.logger.error(f"Failed to process {industry}: {str(e)}")
+                results['failed'].append(industry)
+                self._update_manifest(industry, None, None)
+        
+        self._save_report(results)
+        
+        return results
+    
+    async def generate_all_async(self, industries: Optional[List[str]] = None, limit: Optional[int] = None,
+                                 concurrency: Optional[int] = None, resume: bool = False, batch: bool = False,
+                                 changed_only: bool = False):
+        """Generate demos for many industries at once
+        
+        Up to `concurrency` industries are in flight at once. Each passes through two
+        stages, script generation (OpenAI) and audio synthesis (ElevenLabs), and every
+        stage has its own limit, so scripts for later industries are written while
+        earlier ones are being voiced.
+        The SDK clients are synchronous, so stage work runs on a thread pool.
+        With `batch`, every script is generated up front by one Batch API job.
+        `changed_only` regenerates only outputs whose recorded inputs changed.
+        """
+        target_industries = self._target_industries(industries, limit)
+        self.metrics = RunMetrics(self.config.get('pricing'))
+        
+        loop = asyncio.get_running_loop()
+        target_industries, skipped, prepared, selections = await loop.run_in_executor(
+            None, self._plan_run, target_industries, resume, changed_only, batch
+        )
+        
+        processing = self.config['processing']
+        concurrency = concurrency or processing.get('concurrency', 1)
+        openai_limit = processing.get('openai_concurrency') or concurrency
+        elevenlabs_limit = processing.get('elevenlabs_concurrency') or concurrency
+        
+        industry_slots = asyncio.Semaphore(concurrency)
+        openai_slots = asyncio.Semaphore(openai_limit)
+        elevenlabs_slots = asyncio.Semaphore(elevenlabs_limit)
+        
+        self.logger.info(f"Starting generation for {len(target_industries)} industries "
+                         f"(OpenAI concurrency: {openai_limit}, ElevenLabs concurrency: {elevenlabs_limit})")
+        
+        executor = ThreadPoolExecutor(max_workers=openai_limit + elevenlabs_limit)
+        progress = tqdm(total=len(target_industries), desc="Generating demos")
+        
+        # Outcomes are stored by position so the report keeps the input order
+        outcomes: List[Tuple[Optional[Path], Optional[Path]]] = [(None, None)] * len(target_industries)
+        
+        async def process(index: int, industry: str):
+            async with industry_slots:
+                try:
+                    with self.metrics.span('industry', industry):
+                        if industry in prepared:
+                            scripts, script_paths, customer_voice, receptionist_voice = prepared[industry]
+                        else:
+                            async with openai_slots:
+                                scripts, script_paths, customer_voice, receptionist_voice = await loop.run_in_executor(
+                                    executor, self._prepare_industry, industry, selections.get(industry)
+                                )
+                        
+                        async with elevenlabs_slots:
+                            audio_path, script_path, variants = await loop.run_in_executor(
+                                executor, self._render_audio, scripts, script_paths, industry,
+                                customer_voice, receptionist_voice
+                            )
+                    
+                    outcomes[index] = (audio_path, script_path)
+                    self._update_manifest(industry, audio_path, script_path, variants)
+                    
+                except Exception as e:
+                    self.logger.error(f"Failed to process {industry}: {str(e)}")
+                    self._update_manifest(industry, None, None)
+                finally:
+                    progress.update(1)
+        
+        try:
+            await asyncio.gather(*(process(i, industry) for i, industry in enumerate(target_industries)))
+        finally:
+            progress.close()
+            executor.shutdown(wait=True)
+        
+        results = {
+            'success': [],
+            'failed': [],
+            'skipped': skipped,
+            'total': len(target_industries) + len(skipped)
+        }
+        for industry, (audio_path, script_path) in zip(target_industries, outcomes):
+            self._record_result(results, industry, audio_path, script_path)
+        
+        self._save_report(results)
+        
+        return results
+    
+    def plan(self, industries: Optional[List[str]] = None, limit: Optional[int] = None, resume: bool = False,
+             changed_only: bool = False, batch: bool = False) -> Dict:
+        """Estimate what a run would do, without importing either SDK or calling an API
+        
+        Prompt tokens are counted from the real prompts. Completion tokens and
+        TTS characters come from the target duration and speaking rates, and the
+        number of TTS requests from a template script's turns. Audio-only
+        industries under `changed_only` use their saved scripts. Wall time is
+        projected from the latencies in the `plan` config section under the
+        configured concurrency, and is never less than the rate limits allow.
+        Cache hits are not predicted, so the estimates are upper bounds.
+        """
+        target_industries = self._target_industries(industries, limit)
+        entries = self.manifest.entries()
+        present = [industry for industry in target_industries if self._is_complete(industry, entries.get(industry))]
+        
+        pending, skipped, prepared = list(target_industries), [], {}
+        if changed_only:
+            pending, skipped, prepared, _ = self._plan_changes(target_industries)
+            self._inputs = {}
+        elif resume:
+            pending, skipped = self._skip_completed(target_industries)
+        needs_scripts = [industry for industry in pending if industry not in prepared]
+        
+        # Expected script size from the target duration and speaking rates
+        variants = self.config['openai'].get('variants', 1)
+        rates = self.config.get('validation', {}).get('words_per_minute') or {'default': 150}
+        words_per_minute = sum(rates.values()) / len(rates)
+        target_seconds = self.config['conversation'].get('target_duration_seconds', 90)
+        script_characters = int(target_seconds * words_per_minute / 60 * CHARACTERS_PER_WORD)
+        
+        prompt_tokens = completion_tokens = 0
+        receptionist_names = [voice['name'] for voice in self.config['voices']['receptionist_pool']]
+        for industry in (needs_scripts if self._openai_enabled() else []):
+            request = self._build_script_request(industry, random.choice(receptionist_names), variants)
+            prompt_tokens += sum(len(message['content']) for message in request['messages']) // 4
+            completion_tokens += script_characters // 4 * variants
+        
+        tts_requests = characters = 0
+        for industry in pending:
+            if industry in prepared:
+                scripts = prepared[industry][0]
+            else:
+                scripts = [self.generate_conversation_script_template(industry)] * variants
+            for number in self._variants_to_render(len(scripts)):
+                units = self._segment_units(parse_turns(scripts[number - 1]))
+                tts_requests += len(units)
+                characters += (sum(len(text) for _, _, _, text in units) if industry in prepared
+                               else script_characters)
+        if not self.tts_backend.remote:
+            # Draft segments are rendered locally: nothing is requested or billed
+            tts_requests = characters = 0
+        batch = batch and self._openai_enabled()
+
+        prefix = 'batch_' if batch else ''
+        cost = self.metrics.estimate_cost({f"{prefix}prompt_tokens": prompt_tokens,
+                                           f"{prefix}completion_tokens": completion_tokens,
+                                           'characters_billed': characters})
+        
+        # Latency-bound time: scripts and audio overlap when industries run concurrently
+        processing = self.config['processing']
+        plan_config = self.config.get('plan', {})
+        concurrency = processing.get('concurrency', 1)
+        openai_slots = (processing.get('openai_concurrency') or concurrency) if concurrency > 1 else 1
+        elevenlabs_slots = (processing.get('elevenlabs_concurrency') or concurrency) if concurrency > 1 else 1
+        openai_latency = plan_config.get('openai_seconds_per_request', 12)
+        tts_latency = plan_config.get('tts_seconds_per_request', 1.5)
+        
+        openai_requests = 0 if batch or not self._openai_enabled() else len(needs_scripts)
+        script_seconds = openai_requests * openai_latency / openai_slots
+        tts_seconds = tts_requests * tts_latency / (elevenlabs_slots * processing.get('tts_workers', 4))
+        if concurrency > 1:
+            wall_seconds = max(script_seconds, tts_seconds) + (openai_latency if openai_requests else 0)
+        else:
+            wall_seconds = script_seconds + tts_seconds
+        limited_by = 'latency'
+        
+        # The rate limits set a floor
+        limits = self.config.get('rate_limits', {})
+        openai_limits = limits.get('openai', {})
+        elevenlabs_limits = limits.get('elevenlabs', {})
+        floors = [
+            ('OpenAI requests per minute', openai_requests, openai_limits.get('requests_per_minute')),
+            ('OpenAI tokens per minute', 0 if batch else prompt_tokens + completion_tokens,
+             openai_limits.get('tokens_per_minute')),
+            ('ElevenLabs requests per minute', tts_requests, elevenlabs_limits.get('requests_per_minute')),
+            ('ElevenLabs characters per minute', characters, elevenlabs_limits.get('characters_per_minute')),
+        ]
+        for name, amount, per_minute in floors:
+            if per_minute and amount / per_minute * 60 > wall_seconds:
+                wall_seconds = amount / per_minute * 60
+                limited_by = name
+        
+        return {
+            'industries': len(target_industries),
+            'already_complete': len(present),
+            'skipped': len(skipped),
+            'to_generate': len(pending),
+            'scripts_to_generate': len(needs_scripts),
+            'audio_only': len(prepared),
+            'requests': {
+                'openai': openai_requests,
+                'openai_batches': 1 if batch and needs_scripts else 0,
+                'elevenlabs': tts_requests,
+            },
+            'tokens': {'prompt': prompt_tokens, 'completion': completion_tokens},
+            'characters': characters,
+            'estimated_cost_usd': cost,
+            'projected_wall_seconds': round(wall_seconds, 1),
+            'limited_by': limited_by,
+        }
+    
+    def resolve_voices(self, speaker: str, names: Optional[List[str]]) -> List[Dict]:
+        """Pool voices for a speaker by name (every voice in the pool when `names` is empty)"""
+        pool = self.config['voices'][f"{speaker}_pool"]
+        if not names:
+            return list(pool)
+        by_name = {voice['name'].lower(): voice for voice in pool}
+        unknown = [name for name in names if name.lower() not in by_name]
+        if unknown:
+            raise ValueError(f"Unknown {speaker} voice(s): {', '.join(unknown)} "
+                             f"(choose from {', '.join(voice['name'] for voice in pool)})")
+        return [by_name[name.lower()] for name in names]
+    
+    def generate_voice_matrix(self, industry: str, customer_voices: List[Dict],
+                              receptionist_voices: List[Dict]) -> Path:
+        """Voice one script with every customer x receptionist pairing
+        
+        A single GPT script is written for the first receptionist voice, and the
+        receptionist's name is swapped in for each other pairing. Units from all
+        pairings are deduplicated on (text, voice, settings) and synthesized
+        together, so the cost follows the unique lines rather than the number of
+        pairings: customer lines, for example, are shared by every receptionist.
+        Audio, scripts and a per-pairing manifest go to <slug>_voice_matrix/.
+        Returns the manifest path.
+        """
+        slug = self._slugify(industry)
+        matrix_dir = self.output_dir / f"{slug}_voice_matrix"
+        matrix_dir.mkdir(exist_ok=True)
+        
+        with self.metrics.span('script', industry):
+            base_receptionist = receptionist_voices[0]
+            customer_name = self._select_random_customer_name()
+            scripts = self.generate_script_variants(industry, base_receptionist['name'], 1, customer_name)
+            script = self._validate_scripts(industry, scripts, customer_voices[0], base_receptionist, customer_name)[0]
+        
+        # Every pairing's units, pointing into one list of unique units
+        name_pattern = re.compile(rf"\b{re.escape(base_receptionist['name'])}\b")
+        unique: Dict[Tuple, int] = {}
+        jobs = []
+        pairings = []
+        for customer_voice in customer_voices:
+            for receptionist_voice in receptionist_voices:
+                pairing_script = name_pattern.sub(receptionist_voice['name'], script)
+                units = self._voice_units(parse_turns(pairing_script), customer_voice, receptionist_voice)
+                positions = []
+                for unit in units:
+                    _, _, text, voice_id, voice_settings = unit
+                    key = (text, voice_id, json.dumps(voice_settings, sort_keys=True))
+                    if key not in unique:
+                        unique[key] = len(jobs)
+                        jobs.append(unit)
+                    positions.append(unique[key])
+                pairings.append((customer_voice, receptionist_voice, pairing_script, units, positions))
+        
+        self.logger.info(f"Voice matrix for {industry}: {len(pairings)} pairings, "
+                         f"{sum(len(p[3]) for p in pairings)} units, {len(jobs)} unique")
+        
+        entries = []
+        with tempfile.TemporaryDirectory(dir=self.output_dir, prefix=f".{slug}_matrix_") as segment_dir:
+            with self.metrics.span('tts', industry, units=len(jobs), pairings=len(pairings)):
+                segment_paths = self._synthesize_segments(jobs, Path(segment_dir), industry)
+            
+            for customer_voice, receptionist_voice, pairing_script, units, positions in pairings:
+                stem = f"{self._slugify(customer_voice['name'])}_x_{self._slugify(receptionist_voice['name'])}"
+                script_path = matrix_dir / f"{stem}.txt"
                 with open(script_path, 'w') as f:
-                    f.write(script)
+                    f.write(pairing_script)
                 
-                # Generate audio with selected voices
-                audio_path = self.generate_audio(script, industry, customer_voice, receptionist_voice)
-                
-                if audio_path:
-                    results['success'].append({
-                        'industry': industry,
-                        'audio_file': str(audio_path),
-                        'script_file': str(script_path)
-                    })
+                audio_path = None
+                if all(segment_paths[position] for position in positions):
+                    audio_path = matrix_dir / f"{stem}.mp3"
+                    self._splice([segment_paths[position] for position in positions],
+                                 [unit for _, unit, _, _, _ in units], audio_path, industry)
                 else:
-                    results['failed'].append(industry)
-                
-                # Rate limiting
-                time.sleep(self.config['processing']['rate_limit_delay'])
+                    self.logger.error(f"Voice matrix pairing {stem} failed for {industry}")
                 
-            except Exception as e:
-                self.logger.error(f"Failed to process {industry}: {str(e)}")
-                results['failed'].append(industry)
+                entries.append({
+                    'customer_voice': {key: customer_voice[key] for key in ('name', 'voice_id', 'accent')},
+                    'receptionist_voice': {key: receptionist_voice[key] for key in ('name', 'voice_id', 'accent')},
+                    'status': 'success' if audio_path else 'failed',
+                    'audio_file': str(audio_path) if audio_path else None,
+                    'script_file': str(script_path),
+                    'audio_bytes': audio_path.stat().st_size if audio_path else None,
+                    'units': len(units),
+                })
         
-        # Save results report
-        report_path = self.output_dir / 'generation_report.json'
-        with open(report_path, 'w') as f:
-            json.dump(results, f, indent=2)
+        manifest_path = matrix_dir / 'matrix_manifest.json'
+        with open(manifest_path, 'w') as f:
+            json.dump({
+                'industry': industry,
+                'customer_name': customer_name,
+                'script_receptionist': base_receptionist['name'],
+                'pairings': entries,
+                'total_units': sum(entry['units'] for entry in entries),
+                'unique_units': len(jobs),
+                'metrics': self.metrics.industry_summary(industry),
+            }, f, indent=2)
+        return manifest_path
+    
+    def run_voice_matrix(self, industries: List[str], customer_voices: List[Dict],
+                         receptionist_voices: List[Dict]) -> Dict:
+        """Render the voice matrix for each industry"""
+        self.metrics = RunMetrics(self.config.get('pricing'))
+        self._connect()
+        self._prerender_recurring()
         
-        self.logger.info(f"Generation complete! Success: {len(results['success'])}, Failed: {len(results['failed'])}")
-        self.logger.info(f"Report saved to: {report_path}")
+        results = {'success': [], 'failed': [], 'pairings': len(customer_voices) * len(receptionist_voices)}
+        for industry in tqdm(industries, desc="Voice matrices"):
+            try:
+                manifest_path = self.generate_voice_matrix(industry, customer_voices, receptionist_voices)
+                results['success'].append({'industry': industry, 'manifest': str(manifest_path)})
+            except Exception as e:
+                self.logger.error(f"Voice matrix failed for {industry}: {str(e)}")
+                results['failed'].append(industry)
         
+        self.metrics.finish()
+        results['metrics'] = self.metrics.run_summary()
+        if self.trace_file:
+            self.metrics.write_trace(self.trace_file)
         return results
+    
+    def run(self, industries: Optional[List[str]] = None, limit: Optional[int] = None, resume: bool = False,
+            batch: bool = False, changed_only: bool = False):
+        """Generate demos, concurrently when processing.concurrency is above 1"""
+        if self.config['processing'].get('concurrency', 1) > 1:
+            return asyncio.run(self.generate_all_async(industries=industries, limit=limit, resume=resume,
+                                                       batch=batch, changed_only=changed_only))
+        return self.generate_all(industries=industries, limit=limit, resume=resume, batch=batch,
+                                 changed_only=changed_only)
+
+
+def print_plan(plan: Dict):
+    """Print a run plan"""
+    print("\n" + "="*60)
+    print("RUN PLAN (nothing was generated)")
+    print("="*60)
+    print(f"Industries: {plan['industries']} ({plan['already_complete']} already complete, "
+          f"{plan['skipped']} would be skipped)")
+    print(f"To generate: {plan['to_generate']} ({plan['scripts_to_generate']} new scripts, "
+          f"{plan['audio_only']} audio only)")
+    requests = plan['requests']
+    batches = f" + {requests['openai_batches']} batch job" if requests['openai_batches'] else ""
+    print(f"Requests: {requests['openai']} OpenAI{batches}, {requests['elevenlabs']} ElevenLabs")
+    print(f"Estimated tokens: {plan['tokens']['prompt']} prompt, {plan['tokens']['completion']} completion")
+    print(f"Estimated characters: {plan['characters']}")
+    cost = plan['estimated_cost_usd']
+    print(f"Estimated cost: ${cost['total']:.2f} (OpenAI ${cost['openai']:.2f}, "
+          f"ElevenLabs ${cost['elevenlabs']:.2f}), before TTS cache hits")
+    print(f"Projected wall time: {plan['projected_wall_seconds'] / 60:.1f} min (limited by {plan['limited_by']})")
+    print("="*60)
+
+
+def run_voice_matrix(generator: VoiceDemoGenerator, parser, args, industries: List[str]):
+    """Render voice matrices and print a summary"""
+    matrix_config = generator.config.get('voice_matrix', {})
+    try:
+        customer_voices = generator.resolve_voices(
+            'customer', args.customer_voices.split(',') if args.customer_voices else matrix_config.get('customer_voices')
+        )
+        receptionist_voices = generator.resolve_voices(
+            'receptionist', args.receptionist_voices.split(',') if args.receptionist_voices
+            else matrix_config.get('receptionist_voices')
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    
+    results = generator.run_voice_matrix(industries, customer_voices, receptionist_voices)
+    
+    totals = results['metrics']['totals']
+    print("\n" + "="*60)
+    print("VOICE MATRIX SUMMARY")
+    print("="*60)
+    print(f"Industries: {len(results['success'])} rendered, {len(results['failed'])} failed")
+    print(f"Pairings per industry: {len(customer_voices)} customer x {len(receptionist_voices)} receptionist")
+    print(f"TTS requests: {totals['tts_requests']}, cache hits: {totals['cache_hits']}, "
+          f"characters billed: {totals['characters_billed']}")
+    print(f"Estimated cost: ${results['metrics']['estimated_cost_usd']['total']:.2f}")
+    for result in results['success']:
+        print(f"  {result['industry']}: {result['manifest']}")
+    print("="*60)
 
 
 def main():
@@ -486,11 +1640,45 @@ def main():
     parser.add_argument('--test-mode', action='store_true', help='Run in test mode (3 samples)')
     parser.add_argument('--all', action='store_true', help='Generate for all 89 industries')
     parser.add_argument('--config', type=str, default='config.yaml', help='Path to config file')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip industries whose script and audio are already complete')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the TTS segment cache')
+    parser.add_argument('--clear-cache', action='store_true', help='Delete all cached TTS segments before running')
+    parser.add_argument('--concurrency', type=int, help='Process up to N industries at once (async mode)')
+    parser.add_argument('--openai-concurrency', type=int, help='Max concurrent script generations in async mode')
+    parser.add_argument('--elevenlabs-concurrency', type=int, help='Max concurrent audio syntheses in async mode')
+    parser.add_argument('--trace', type=str, help='Write a Chrome trace of the run to this file')
+    parser.add_argument('--variants', type=int, help='Script variants to request per industry in one GPT call')
+    parser.add_argument('--render-variant', type=str,
+                        help="Variant number to voice, or 'all' (default: 1)")
+    parser.add_argument('--batch-api', action='store_true',
+                        help='Generate all scripts with one OpenAI Batch API job (cheaper, not interactive)')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='Regenerate only scripts or audio whose recorded inputs changed')
+    parser.add_argument('--plan', action='store_true',
+                        help='Show what a run would do and cost, without calling either API')
+    parser.add_argument('--voice-matrix', action='store_true',
+                        help='Voice one script per industry with every customer x receptionist voice pairing')
+    parser.add_argument('--customer-voices', type=str,
+                        help='Comma-separated customer voice names for --voice-matrix (default: config)')
+    parser.add_argument('--receptionist-voices', type=str,
+                        help='Comma-separated receptionist voice names for --voice-matrix (default: config)')
+    parser.add_argument('--draft', action='store_true',
+                        help='Render audio with the local draft TTS backend instead of ElevenLabs')
+    parser.add_argument('--offline', action='store_true',
+                        help='Use template scripts and draft audio, calling no API (for previews and CI)')
     
     args = parser.parse_args()
     
     # Initialize generator
-    generator = VoiceDemoGenerator(config_path=args.config)
+    generator = VoiceDemoGenerator(config_path=args.config, tts_backend='draft' if args.draft else None,
+                                   offline=args.offline)
+    generator.trace_file = args.trace
+    
+    if args.clear_cache:
+        generator.segment_cache.clear()
+    if args.no_cache:
+        generator.segment_cache.enabled = False
     
     # Determine which industries to process
     industries = None
@@ -502,8 +1690,39 @@ def main():
     elif args.industries:
         industries = [i.strip() for i in args.industries.split(',')]
     
+    # Command line variant options override the config
+    if args.variants:
+        generator.config['openai']['variants'] = args.variants
+    if args.render_variant:
+        variants = generator.config['openai'].get('variants', 1)
+        if args.render_variant != 'all' and not (args.render_variant.isdigit()
+                                                 and 1 <= int(args.render_variant) <= variants):
+            parser.error(f"--render-variant must be 'all' or a number from 1 to {variants}")
+        generator.config['output']['render_variants'] = (
+            'all' if args.render_variant == 'all' else int(args.render_variant)
+        )
+    
+    # Command line concurrency limits override the config
+    processing = generator.config['processing']
+    if args.concurrency:
+        processing['concurrency'] = args.concurrency
+    if args.openai_concurrency:
+        processing['openai_concurrency'] = args.openai_concurrency
+    if args.elevenlabs_concurrency:
+        processing['elevenlabs_concurrency'] = args.elevenlabs_concurrency
+    
+    if args.plan:
+        print_plan(generator.plan(industries=industries, limit=limit, resume=args.resume,
+                                  changed_only=args.changed_only, batch=args.batch_api))
+        return
+    
+    if args.voice_matrix:
+        run_voice_matrix(generator, parser, args, industries or generator.industries[:limit])
+        return
+    
     # Generate
-    results = generator.generate_all(industries=industries, limit=limit)
+    results = generator.run(industries=industries, limit=limit, resume=args.resume, batch=args.batch_api,
+                            changed_only=args.changed_only)
     
     # Print summary
     print("\n" + "="*60)
@@ -512,6 +1731,19 @@ def main():
     print(f"Total industries: {results['total']}")
     print(f"Successfully generated: {len(results['success'])}")
     print(f"Failed: {len(results['failed'])}")
+    print(f"Skipped (already complete or unchanged): {len(results['skipped'])}")
+    print(f"TTS cache hits: {results['cache']['hits']}, misses: {results['cache']['misses']}")
+    for host, connections in results['connections'].items():
+        print(f"Connections to {host}: {connections['connections_opened']} opened, "
+              f"{connections['reuse_rate']:.0%} of requests reused one")
+    
+    metrics = results['metrics']
+    print(f"Tokens: {metrics['totals']['prompt_tokens'] + metrics['totals']['batch_prompt_tokens']} prompt, "
+          f"{metrics['totals']['completion_tokens'] + metrics['totals']['batch_completion_tokens']} completion")
+    print(f"Characters billed: {metrics['totals']['characters_billed']}")
+    print(f"Estimated cost: ${metrics['estimated_cost_usd']['total']:.2f} "
+          f"(OpenAI ${metrics['estimated_cost_usd']['openai']:.2f}, "
+          f"ElevenLabs ${metrics['estimated_cost_usd']['elevenlabs']:.2f})")
     
     if results['failed']:
         print("\nFailed industries:")
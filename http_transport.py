@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Shared pooled HTTP client for the OpenAI and ElevenLabs SDKs
+One keep-alive pool serves both providers, connections can be opened at
+startup, and connection reuse is measured through httpcore's trace extension
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from rate_limiter import record_failed_response
+
+try:
+    import h2  # noqa: F401  (HTTP/2 support for httpx)
+except ImportError:
+    h2 = None
+
+
+class ConnectionStats:
+    """Thread-safe per-host counts of requests, new connections and TLS handshakes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict] = {}
+
+    def _host(self, host: str) -> Dict:
+        """Counters for one host (lock held)"""
+        return self._hosts.setdefault(host, {
+            'requests': 0,
+            'warm_up_requests': 0,
+            'connections_opened': 0,
+            'tls_handshakes': 0,
+            'http_versions': {},
+        })
+
+    def on_request(self, request: httpx.Request):
+        """Event hook: attach a trace callback that sees connection setup for this request"""
+        host = request.url.host
+        request.extensions['trace'] = lambda name, info: self._trace(host, name)
+
+    def on_response(self, response: httpx.Response):
+        """Event hook: count a completed request and its protocol"""
+        with self._lock:
+            counters = self._host(response.request.url.host)
+            if response.request.extensions.get('warm_up'):
+                counters['warm_up_requests'] += 1
+            else:
+                counters['requests'] += 1
+            versions = counters['http_versions']
+            versions[response.http_version] = versions.get(response.http_version, 0) + 1
+
+    def _trace(self, host: str, name: str):
+        """httpcore trace callback; only connection setup events are counted"""
+        if name == 'connection.connect_tcp.complete':
+            key = 'connections_opened'
+        elif name == 'connection.start_tls.complete':
+            key = 'tls_handshakes'
+        else:
+            return
+        with self._lock:
+            self._host(host)[key] += 1
+
+    def snapshot(self) -> Dict:
+        """Per-host counters plus the share of requests that reused a connection"""
+        with self._lock:
+            hosts = {host: dict(counters, http_versions=dict(counters['http_versions']))
+                     for host, counters in self._hosts.items()}
+
+        for counters in hosts.values():
+            total = counters['requests'] + counters['warm_up_requests']
+            reused = max(0, total - counters['connections_opened'])
+            counters['reused_connections'] = reused
+            counters['reuse_rate'] = round(reused / total, 3) if total else 0.0
+        return hosts
+
+
+def create_http_client(config: Dict, timeout: float = 60,
+                       logger: Optional[logging.Logger] = None) -> Tuple[httpx.Client, ConnectionStats]:
+    """Build the shared client from the config's `http` section"""
+    logger = logger or logging.getLogger(__name__)
+    http2 = config.get('http2', True)
+    if http2 and h2 is None:
+        logger.info("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        http2 = False
+
+    stats = ConnectionStats()
+    client = httpx.Client(
+        http2=http2,
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=config.get('max_connections', 100),
+            max_keepalive_connections=config.get('max_keepalive_connections', 32),
+            keepalive_expiry=config.get('keepalive_expiry', 60),
+        ),
+        # Failed responses are recorded so their Retry-After reaches the rate limiters
+        event_hooks={'request': [stats.on_request], 'response': [stats.on_response, record_failed_response]},
+    )
+    return client, stats
+
+
+def warm_up(client: httpx.Client, origins: Dict[str, int], logger: Optional[logging.Logger] = None):
+    """Open connections ahead of the first real request
+
+    `origins` maps a base URL to the number of connections to open. Each
+    connection is established by a concurrent HEAD request; the status code
+    does not matter, only that the (TLS) connection is left in the pool.
+    """
+    logger = logger or logging.getLogger(__name__)
+
+    def head(url: str):
+        try:
+            client.head(url, extensions={'warm_up': True})
+        except httpx.HTTPError as e:
+            logger.debug(f"Warm-up request to {url} failed: {str(e)}")
+
+    urls = [url for url, connections in origins.items() for _ in range(connections)]
+    if not urls:
+        return
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        list(executor.map(head, urls))
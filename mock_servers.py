@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Local stand-in servers for the OpenAI and ElevenLabs APIs
+Serves the chat-completions, files/batches and text-to-speech endpoints the SDKs
+call, with configurable latency, jitter, errors and 429 throttling, so the
+pipeline can be run and benchmarked without API keys or credits
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import mp3_tools
+from rate_limiter import TokenBucket
+
+# Spoken words per second used to size the returned audio
+WORDS_PER_SECOND = 2.5
+
+# Audio bytes sent per write when streaming TTS responses
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+class MockSettings:
+    """Behaviour of the stand-in servers"""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.05, tts_chars_per_second: float = 1000.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, requests_per_minute: Optional[float] = None,
+                 retry_after: float = 1.0, seed: Optional[int] = None, batch_seconds: float = 1.0):
+        """Configure latency (seconds), error/429 probabilities and an optional server-side quota"""
+        self.latency = latency
+        self.jitter = jitter
+        self.tts_chars_per_second = tts_chars_per_second
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.batch_seconds = batch_seconds
+        self.random = random.Random(seed)
+
+
+class MockStats:
+    """Thread-safe request counters and server-side latencies per endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.throttled: Dict[str, int] = {}
+        self.early_retries: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.latencies: Dict[str, List[float]] = {}
+        self.characters = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def count(self, table: Dict, endpoint: str):
+        with self._lock:
+            table[endpoint] = table.get(endpoint, 0) + 1
+
+    def observe(self, endpoint: str, seconds: float):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+
+    def add_usage(self, characters: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0):
+        with self._lock:
+            self.characters += characters
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def snapshot(self) -> Dict:
+        """Plain-dict copy of every counter"""
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'throttled': dict(self.throttled),
+                'early_retries': dict(self.early_retries),
+                'errors': dict(self.errors),
+                'characters': self.characters,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+            }
+
+
+def _field(prompt: str, name: str, default: str) -> str:
+    """Pull a '- Name: value' line out of the generator's prompt"""
+    match = re.search(rf"- {name}: (.+)", prompt)
+    return match.group(1).strip() if match else default
+
+
+def chat_completion(request: Dict) -> Dict:
+    """Chat-completions response body for a request"""
+    prompt = request['messages'][-1]['content']
+    prompt_tokens = sum(len(m['content']) for m in request['messages']) // 4
+    choices = []
+    completion_tokens = 0
+    for index in range(request.get('n', 1)):
+        # Seeded by the prompt so identical requests get identical scripts
+        script = mock_script(prompt, random.Random(f"{prompt}:{index}"))
+        completion_tokens += len(script) // 4
+        choices.append({
+            'index': index,
+            'message': {'role': 'assistant', 'content': script},
+            'finish_reason': 'stop',
+        })
+
+    return {
+        'id': f"chatcmpl-mock-{time.monotonic_ns()}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': request.get('model', 'gpt-4o'),
+        'choices': choices,
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def mock_script(prompt: str, rng: random.Random) -> str:
+    """A plausible inbound-call script built from the prompt's context"""
+    business = _field(prompt, 'Business', 'the business')
+    receptionist = _field(prompt, 'Receptionist name', 'Rachel')
+    customer = _field(prompt, 'Customer name', 'James Martinez')
+    phone = _field(prompt, 'Phone', '555-0123')
+    first_name = customer.split()[0]
+
+    fillers = ['um', 'uh', 'you know', 'like', 'actually']
+
+    def filler() -> str:
+        return rng.choice(fillers)
+
+    lines = [
+        f"AI Receptionist: Hi, this is {business}. I am {receptionist}, {business} AI receptionist. How can I help you today?",
+        f"Customer: Hi, I'm {customer}. I've been, {filler()}, meaning to get something sorted for a while now... can you help with that?",
+        f"AI Receptionist: Absolutely, {first_name}. That's exactly what we do, and most people find it, {filler()}, really quick and easy.",
+        f"Customer: Oh, great. Is it... {filler()}, something you could fit in this week?",
+        "AI Receptionist: We do have openings this week. Would you like me to book an appointment for you?",
+        "Customer: Yes please, that would be perfect.",
+        "AI Receptionist: Wonderful. Could I get your first name, please?",
+        f"Customer: Sure, it's {first_name}.",
+        "AI Receptionist: Thank you. And the best phone number to reach you?",
+        f"Customer: It's {phone}.",
+        "AI Receptionist: Got it. And finally, what's your email address?",
+        f"Customer: It's {first_name.lower()}@email.com.",
+        "AI Receptionist: Thank you for the information. Your appointment is booked and I have also messaged and emailed you the details.",
+        f"Customer: Awesome, thanks so much, {receptionist}!",
+    ]
+    return "\n\n".join(lines)
+
+
+class MockAPIServer(ThreadingHTTPServer):
+    """HTTP server answering both OpenAI and ElevenLabs routes"""
+
+    daemon_threads = True
+
+    def __init__(self, address, settings: MockSettings):
+        super().__init__(address, MockAPIHandler)
+        self.settings = settings
+        self.stats = MockStats()
+        self.quota = TokenBucket(settings.requests_per_minute) if settings.requests_per_minute else None
+        self.files: Dict[str, Dict] = {}
+        self.batches: Dict[str, Dict] = {}
+        self.batch_lock = threading.Lock()
+        # Throttled requests -> when their Retry-After ends, to spot retries that came back too soon
+        self.retry_deadlines: Dict[str, float] = {}
+        self.retry_lock = threading.Lock()
+    
+    def check_retry(self, key: str) -> bool:
+        """Whether a request repeats a throttled one before its Retry-After has passed"""
+        with self.retry_lock:
+            deadline = self.retry_deadlines.pop(key, None)
+        # Allow for the timer granularity of the client's sleep
+        return deadline is not None and time.monotonic() < deadline - 0.01
+    
+    def throttle(self, key: str):
+        """Remember when a throttled request may be retried"""
+        with self.retry_lock:
+            self.retry_deadlines[key] = time.monotonic() + self.settings.retry_after
+
+    def add_file(self, content: bytes, filename: str, purpose: str) -> Dict:
+        """Store an uploaded file and return its file object"""
+        file_object = {
+            'id': f"file-mock-{uuid.uuid4().hex[:24]}",
+            'object': 'file',
+            'bytes': len(content),
+            'created_at': int(time.time()),
+            'filename': filename,
+            'purpose': purpose,
+            'status': 'processed',
+        }
+        with self.batch_lock:
+            self.files[file_object['id']] = dict(file_object, content=content)
+        return file_object
+
+    def run_batch(self, batch_id: str):
+        """Work through a batch in the background, as the real service does"""
+        with self.batch_lock:
+            batch = self.batches[batch_id]
+            lines = [line for line in self.files[batch['input_file_id']]['content'].decode('utf-8').splitlines()
+                     if line.strip()]
+            batch.update(status='in_progress', in_progress_at=int(time.time()),
+                         request_counts={'total': len(lines), 'completed': 0, 'failed': 0})
+
+        time.sleep(self.settings.batch_seconds)
+
+        outputs, errors = [], []
+        for line in lines:
+            request = json.loads(line)
+            record = {'id': f"batch_req_{uuid.uuid4().hex[:24]}", 'custom_id': request['custom_id']}
+            if self.settings.random.random() < self.settings.error_rate:
+                errors.append(dict(record, response=None,
+                                   error={'code': 'server_error', 'message': 'Injected batch request error'}))
+                continue
+            body = chat_completion(request['body'])
+            self.stats.add_usage(prompt_tokens=body['usage']['prompt_tokens'],
+                                 completion_tokens=body['usage']['completion_tokens'])
+            outputs.append(dict(record, response={'status_code': 200, 'request_id': record['id'], 'body': body},
+                                error=None))
+
+        def to_file(records: List[Dict], kind: str) -> Optional[str]:
+            if not records:
+                return None
+            content = ''.join(json.dumps(record) + '\n' for record in records).encode('utf-8')
+            return self.add_file(content, f"{batch_id}_{kind}.jsonl", 'batch_output')['id']
+
+        output_file_id = to_file(outputs, 'output')
+        error_file_id = to_file(errors, 'error')
+        with self.batch_lock:
+            now = int(time.time())
+            batch.update(status='completed', output_file_id=output_file_id, error_file_id=error_file_id,
+                         finalizing_at=now, completed_at=now,
+                         request_counts={'total': len(outputs) + len(errors), 'completed': len(outputs),
+                                         'failed': len(errors)})
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self) -> Dict[str, str]:
+        """Environment variables that point the generator at this server"""
+        return {
+            'OPENAI_API_KEY': 'mock-openai-key',
+            'ELEVENLABS_API_KEY': 'mock-elevenlabs-key',
+            'OPENAI_BASE_URL': f"{self.base_url}/v1",
+            'ELEVENLABS_BASE_URL': self.base_url,
+        }
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    """Routes requests to the stand-in endpoint implementations"""
+
+    protocol_version = 'HTTP/1.1'
+    server: MockAPIServer
+
+    def log_message(self, format, *args):
+        """Keep the console quiet"""
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _simulate(self, endpoint: str, extra_latency: float = 0.0, request: Optional[Dict] = None) -> bool:
+        """Apply latency, throttling and injected errors; returns False if a response was sent
+        
+        Retries of a throttled `request` (the same path and body) that arrive
+        before its Retry-After has passed are counted as early retries.
+        """
+        settings = self.server.settings
+        stats = self.server.stats
+        stats.count(stats.requests, endpoint)
+        key = f"{self.path} {json.dumps(request, sort_keys=True)}" if request is not None else None
+        if key and self.server.check_retry(key):
+            stats.count(stats.early_retries, endpoint)
+        
+        throttled = settings.random.random() < settings.throttle_rate
+        if self.server.quota and not throttled:
+            throttled = not self.server.quota.try_acquire()
+        if throttled:
+            stats.count(stats.throttled, endpoint)
+            if key:
+                self.server.throttle(key)
+            self._send_json(429, {'error': {'message': 'Rate limit exceeded', 'type': 'rate_limit'}},
+                            {'Retry-After': f"{settings.retry_after:g}"})
+            return False
+
+        delay = max(0.0, settings.latency + settings.random.uniform(-settings.jitter, settings.jitter))
+        time.sleep(delay + extra_latency)
+
+        if settings.random.random() < settings.error_rate:
+            stats.count(stats.errors, endpoint)
+            self._send_json(500, {'error': {'message': 'Injected server error', 'type': 'server_error'}})
+            return False
+        return True
+
+    def do_POST(self):
+        started = time.monotonic()
+        path = urlparse(self.path).path
+
+        if path == '/v1/chat/completions':
+            endpoint = 'chat'
+            self._chat_completions()
+        elif path == '/v1/files':
+            endpoint = 'files'
+            self._upload_file()
+        elif path == '/v1/batches':
+            endpoint = 'batches'
+            self._create_batch()
+        elif re.fullmatch(r'/v1/text-to-speech/[^/]+(/stream)?', path):
+            endpoint = 'tts'
+            self._text_to_speech()
+        else:
+            endpoint = 'unknown'
+            self._send_json(404, {'detail': f"No mock route for POST {path}"})
+
+        self.server.stats.observe(endpoint, time.monotonic() - started)
+
+    def do_GET(self):
+        started = time.monotonic()
+        path = urlparse(self.path).path
+
+        batch_match = re.fullmatch(r'/v1/batches/([^/]+)', path)
+        content_match = re.fullmatch(r'/v1/files/([^/]+)/content', path)
+        if batch_match:
+            endpoint = 'batches'
+            self._retrieve_batch(batch_match.group(1))
+        elif content_match:
+            endpoint = 'files'
+            self._file_content(content_match.group(1))
+        else:
+            endpoint = 'unknown'
+            self._send_json(404, {'detail': f"No mock route for GET {path}"})
+
+        self.server.stats.observe(endpoint, time.monotonic() - started)
+
+    def do_HEAD(self):
+        # Connection warm-up; any status will do, as long as the connection stays open
+        self.server.stats.count(self.server.stats.requests, 'head')
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _chat_completions(self):
+        request = self._read_json()
+        if not self._simulate('chat', request=request):
+            return
+
+        body = chat_completion(request)
+        self.server.stats.add_usage(prompt_tokens=body['usage']['prompt_tokens'],
+                                    completion_tokens=body['usage']['completion_tokens'])
+        self._send_json(200, body)
+
+    def _upload_file(self):
+        """Accept a multipart file upload (purpose=batch input files)"""
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        if not self._simulate('files'):
+            return
+
+        header = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode('utf-8')
+        message = BytesParser(policy=HTTP).parsebytes(header + body)
+        fields, content, filename = {}, b'', 'upload.jsonl'
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if name == 'file':
+                content = part.get_payload(decode=True) or b''
+                filename = part.get_filename() or filename
+            else:
+                fields[name] = part.get_content().strip()
+
+        self._send_json(200, self.server.add_file(content, filename, fields.get('purpose', 'batch')))
+
+    def _create_batch(self):
+        request = self._read_json()
+        if not self._simulate('batches'):
+            return
+
+        server = self.server
+        if request.get('input_file_id') not in server.files:
+            self._send_json(404, {'error': {'message': 'No such file', 'type': 'invalid_request_error'}})
+            return
+
+        batch = {
+            'id': f"batch_mock_{uuid.uuid4().hex[:24]}",
+            'object': 'batch',
+            'endpoint': request.get('endpoint', '/v1/chat/completions'),
+            'errors': None,
+            'input_file_id': request['input_file_id'],
+            'completion_window': request.get('completion_window', '24h'),
+            'status': 'validating',
+            'output_file_id': None,
+            'error_file_id': None,
+            'created_at': int(time.time()),
+            'request_counts': {'total': 0, 'completed': 0, 'failed': 0},
+            'metadata': request.get('metadata'),
+        }
+        with server.batch_lock:
+            server.batches[batch['id']] = batch
+            response = dict(batch)
+        threading.Thread(target=server.run_batch, args=(batch['id'],), daemon=True).start()
+        self._send_json(200, response)
+
+    def _retrieve_batch(self, batch_id: str):
+        if not self._simulate('batches'):
+            return
+        with self.server.batch_lock:
+            batch = dict(self.server.batches[batch_id]) if batch_id in self.server.batches else None
+        if batch is None:
+            self._send_json(404, {'error': {'message': 'No such batch', 'type': 'invalid_request_error'}})
+            return
+        self._send_json(200, batch)
+
+    def _file_content(self, file_id: str):
+        if not self._simulate('files'):
+            return
+        with self.server.batch_lock:
+            stored = self.server.files.get(file_id)
+        if stored is None:
+            self._send_json(404, {'error': {'message': 'No such file', 'type': 'invalid_request_error'}})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(stored['content'])))
+        self.end_headers()
+        self.wfile.write(stored['content'])
+
+    def _text_to_speech(self):
+        request = self._read_json()
+        text = request.get('text', '')
+        settings = self.server.settings
+        if not self._simulate('tts', len(text) / settings.tts_chars_per_second, request):
+            return
+
+        # mp3_<sample rate>_<bitrate>, as the ElevenLabs output_format query parameter
+        output_format = parse_qs(urlparse(self.path).query).get('output_format', ['mp3_44100_128'])[0]
+        _, sample_rate, bitrate = output_format.split('_')
+        duration = max(0.5, len(text.split()) / WORDS_PER_SECOND)
+        audio = mp3_tools.silence(duration, int(sample_rate), int(bitrate))
+        self.server.stats.add_usage(characters=len(text))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Content-Length', str(len(audio)))
+        self.end_headers()
+        for start in range(0, len(audio), STREAM_CHUNK_SIZE):
+            self.wfile.write(audio[start:start + STREAM_CHUNK_SIZE])
+
+
+def start_server(settings: Optional[MockSettings] = None, host: str = '127.0.0.1', port: int = 0) -> MockAPIServer:
+    """Start a mock server on a background thread (port 0 picks a free port)"""
+    server = MockAPIServer((host, port), settings or MockSettings())
+    thread = threading.Thread(target=server.serve_forever, name='mock-api-server', daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    """Run the stand-in servers until interrupted"""
+    parser = argparse.ArgumentParser(description='Local stand-in for the OpenAI and ElevenLabs APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--latency', type=float, default=0.2, help='Base response latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Random latency added or removed (seconds)')
+    parser.add_argument('--tts-chars-per-second', type=float, default=1000.0,
+                        help='Simulated synthesis speed (adds latency per character)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of a 500 response')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Probability of a 429 response')
+    parser.add_argument('--requests-per-minute', type=float, help='Server-side quota enforced with 429s')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After sent with 429s (seconds)')
+    parser.add_argument('--seed', type=int, help='Seed for reproducible latency and failures')
+    parser.add_argument('--batch-seconds', type=float, default=1.0, help='Time each batch job takes to complete')
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency=args.latency,
+        jitter=args.jitter,
+        tts_chars_per_second=args.tts_chars_per_second,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        requests_per_minute=args.requests_per_minute,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        batch_seconds=args.batch_seconds,
+    )
+    server = MockAPIServer((args.host, args.port), settings)
+
+    print(f"Mock OpenAI + ElevenLabs API listening on {server.base_url}")
+    print("Point the generator at it with:")
+    for name, value in server.environment().items():
+        print(f"  export {name}={value}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping mock server")
+        print(json.dumps(server.stats.snapshot(), indent=2))
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
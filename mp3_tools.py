@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+MP3 frame helpers for assembling conversation audio
+Parses MPEG Layer III frame headers, builds pre-encoded silence and concatenates
+segments at frame level without decoding or re-encoding
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Layer III bitrates (kbps) by bitrate index
+MPEG1_BITRATES = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+MPEG2_BITRATES = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+
+# Sample rates by MPEG version id (header bits) and sample rate index
+SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+CHANNEL_MODE_MONO = 3
+
+# Bytes scanned at a time when looking for the next frame in a file
+RESYNC_WINDOW = 64 * 1024
+
+
+def _version_for_sample_rate(sample_rate: int) -> int:
+    """Return the MPEG version id that supports a sample rate"""
+    for version, rates in SAMPLE_RATES.items():
+        if sample_rate in rates:
+            return version
+    raise ValueError(f"Unsupported MP3 sample rate: {sample_rate}")
+
+
+def lowest_bitrate(sample_rate: int) -> int:
+    """Lowest Layer III bitrate for a sample rate (enough for silence, which carries no data)"""
+    return (MPEG1_BITRATES if _version_for_sample_rate(sample_rate) == 3 else MPEG2_BITRATES)[1]
+
+
+def samples_per_frame(version: int) -> int:
+    """Number of PCM samples in one Layer III frame"""
+    return 1152 if version == 3 else 576
+
+
+def side_info_size(version: int, channel_mode: int) -> int:
+    """Size in bytes of the Layer III side information block"""
+    mono = channel_mode == CHANNEL_MODE_MONO
+    if version == 3:
+        return 17 if mono else 32
+    return 9 if mono else 17
+
+
+def frame_length(version: int, bitrate: int, sample_rate: int, padding: int = 0) -> int:
+    """Length in bytes of a Layer III frame"""
+    coefficient = 144 if version == 3 else 72
+    return coefficient * bitrate * 1000 // sample_rate + padding
+
+
+def build_header(sample_rate: int, bitrate: int, channels: int = 1, padding: int = 0) -> bytes:
+    """Build a 4-byte Layer III frame header (no CRC)"""
+    version = _version_for_sample_rate(sample_rate)
+    bitrates = MPEG1_BITRATES if version == 3 else MPEG2_BITRATES
+    if bitrate not in bitrates[1:]:
+        raise ValueError(f"Unsupported MP3 bitrate: {bitrate} kbps")
+
+    channel_mode = CHANNEL_MODE_MONO if channels == 1 else 1  # joint stereo
+
+    return bytes([
+        0xFF,
+        0xE0 | (version << 3) | (1 << 1) | 1,  # sync, version, layer III, no CRC
+        (bitrates.index(bitrate) << 4) | (SAMPLE_RATES[version].index(sample_rate) << 2) | (padding << 1),
+        channel_mode << 6,
+    ])
+
+
+@lru_cache(maxsize=None)
+def silence_frame(sample_rate: int = 44100, bitrate: int = 128, channels: int = 1) -> bytes:
+    """Return one silent frame
+
+    Zeroed side information means no Huffman data and zero gain, which every
+    decoder renders as digital silence.
+    """
+    header = build_header(sample_rate, bitrate, channels)
+    version = _version_for_sample_rate(sample_rate)
+    return header + bytes(frame_length(version, bitrate, sample_rate) - len(header))
+
+
+@lru_cache(maxsize=64)
+def silence(duration_seconds: float, sample_rate: int = 44100, bitrate: int = 128, channels: int = 1) -> bytes:
+    """Return enough silent frames to cover a duration"""
+    version = _version_for_sample_rate(sample_rate)
+    frame_count = max(0, round(duration_seconds * sample_rate / samples_per_frame(version)))
+    return silence_frame(sample_rate, bitrate, channels) * frame_count
+
+
+def looks_like_mp3(data: bytes) -> bool:
+    """Check whether data starts like an MP3 file (ID3 tag or frame sync)"""
+    if data[:3] == b'ID3':
+        return True
+    return len(data) >= 2 and data[0] == 0xFF and (data[1] & 0xE0) == 0xE0
+
+
+class FrameHeader(NamedTuple):
+    """Decoded fields of a Layer III frame header"""
+    version: int
+    protected: bool
+    bitrate: int
+    sample_rate: int
+    padding: int
+    channel_mode: int
+    length: int
+
+    @property
+    def samples(self) -> int:
+        """PCM samples carried by the frame"""
+        return samples_per_frame(self.version)
+
+    @property
+    def format(self) -> Tuple[int, int, int]:
+        """(version, sample rate, mono) - frames must agree on these to be concatenated"""
+        return self.version, self.sample_rate, self.channel_mode == CHANNEL_MODE_MONO
+
+
+def parse_header(data, offset: int = 0) -> Optional[FrameHeader]:
+    """Decode the Layer III frame header at `offset`, or None if there is none"""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None  # Reserved values, other layers or free format
+
+    bitrate = (MPEG1_BITRATES if version == 3 else MPEG2_BITRATES)[bitrate_index]
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    return FrameHeader(
+        version=version,
+        protected=not (b1 & 0x01),
+        bitrate=bitrate,
+        sample_rate=sample_rate,
+        padding=padding,
+        channel_mode=b3 >> 6,
+        length=frame_length(version, bitrate, sample_rate, padding),
+    )
+
+
+def id3v2_size(data) -> int:
+    """Size of a leading ID3v2 tag (0 if there is none)"""
+    if len(data) < 10 or bytes(data[:3]) != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def trailing_tags_size(data) -> int:
+    """Size of ID3v1 and APEv2 tags at the end of the data (or of its last bytes)"""
+    end = len(data)
+    if end >= 128 and bytes(data[end - 128:end - 125]) == b'TAG':
+        end -= 128
+    if end >= 32 and bytes(data[end - 32:end - 24]) == b'APETAGEX':
+        tag_size, flags = struct.unpack_from('<II', data, end - 20)
+        end -= tag_size + (32 if flags & 0x80000000 else 0)
+    return len(data) - end
+
+
+def is_info_frame(data, offset: int, header: FrameHeader) -> bool:
+    """Whether a frame is a Xing/Info/VBRI metadata frame rather than audio"""
+    tag_offset = offset + 4 + (2 if header.protected else 0) + side_info_size(header.version, header.channel_mode)
+    if bytes(data[tag_offset:tag_offset + 4]) in (b'Xing', b'Info'):
+        return True
+    return bytes(data[offset + 36:offset + 40]) == b'VBRI'
+
+
+def info_frame_totals(data, offset: int, header: FrameHeader) -> Tuple[Optional[int], Optional[int]]:
+    """(frame count, byte count) declared by a Xing/Info or VBRI frame, None where absent"""
+    tag_offset = offset + 4 + (2 if header.protected else 0) + side_info_size(header.version, header.channel_mode)
+    if bytes(data[tag_offset:tag_offset + 4]) in (b'Xing', b'Info'):
+        flags, = struct.unpack_from('>I', data, tag_offset + 4)
+        position = tag_offset + 8
+        frames = total_bytes = None
+        if flags & 0x01:
+            frames, = struct.unpack_from('>I', data, position)
+            position += 4
+        if flags & 0x02:
+            total_bytes, = struct.unpack_from('>I', data, position)
+        return frames, total_bytes
+    if bytes(data[offset + 36:offset + 40]) == b'VBRI':
+        total_bytes, frames = struct.unpack_from('>II', data, offset + 46)
+        return frames, total_bytes
+    return None, None
+
+
+# Amplitude change of one global_gain step (a factor of 2 ** 0.25)
+GAIN_STEP_DB = 1.505
+
+
+class Granule(NamedTuple):
+    """Side information fields of one granule and channel"""
+    part2_3_length: int  # Bits of main data
+    big_values: int
+    global_gain: int  # Quantizer step size; one step is GAIN_STEP_DB
+    gain_bit: int  # Position of global_gain in the side information, in bits
+
+
+def _granule_layout(header: FrameHeader) -> Tuple[int, int, int]:
+    """(bits before the first granule, bits per granule, granules) of a frame's side information"""
+    channels = 1 if header.channel_mode == CHANNEL_MODE_MONO else 2
+    if header.version == 3:
+        return 9 + (5 if channels == 1 else 3) + 4 * channels, 59, 2 * channels
+    return 8 + channels, 63, channels
+
+
+def side_info(data, offset: int, header: FrameHeader) -> Tuple[int, List[Granule]]:
+    """main_data_begin (bit reservoir bytes used from earlier frames) and the granules of a frame"""
+    start = offset + 4 + (2 if header.protected else 0)
+    size = side_info_size(header.version, header.channel_mode)
+    bits = int.from_bytes(bytes(data[start:start + size]), 'big')
+    total = size * 8
+
+    def field(position: int, width: int) -> int:
+        return (bits >> (total - position - width)) & ((1 << width) - 1)
+
+    position, granule_bits, count = _granule_layout(header)
+    granules = []
+    for _ in range(count):
+        granules.append(Granule(field(position, 12), field(position + 12, 9), field(position + 21, 8),
+                                position + 21))
+        position += granule_bits
+    return field(0, 9 if header.version == 3 else 8), granules
+
+
+def main_data_size(header: FrameHeader) -> int:
+    """Bytes of a frame available for main data (and so for the bit reservoir)"""
+    return header.length - 4 - (2 if header.protected else 0) - side_info_size(header.version, header.channel_mode)
+
+
+def _crc16(data: bytes) -> int:
+    """MPEG audio CRC-16 (polynomial 0x8005, initial value 0xFFFF)"""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005 if crc & 0x8000 else crc << 1) & 0xFFFF
+    return crc
+
+
+def adjust_gain(frame: bytearray, header: FrameHeader, steps: int):
+    """Scale a frame's decoded amplitude by `steps` global_gain steps, in place
+
+    Only the side information changes, so nothing is re-encoded and the
+    change is lossless and reversible (the same technique as mp3gain). Gains
+    are clamped to the field's 0-255 range, and the CRC is recomputed for
+    protected frames.
+    """
+    if not steps:
+        return
+    start = 6 if header.protected else 4
+    size = side_info_size(header.version, header.channel_mode)
+    bits = int.from_bytes(bytes(frame[start:start + size]), 'big')
+    total = size * 8
+    for granule in side_info(frame, 0, header)[1]:
+        shift = total - granule.gain_bit - 8
+        gain = min(255, max(0, granule.global_gain + steps))
+        bits = (bits & ~(0xFF << shift)) | (gain << shift)
+    frame[start:start + size] = bits.to_bytes(size, 'big')
+    if header.protected:
+        frame[4:6] = _crc16(bytes(frame[2:4]) + bytes(frame[6:6 + size])).to_bytes(2, 'big')
+
+
+def iter_frames(data, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, FrameHeader]]:
+    """Yield (offset, header) for every complete frame between start and end
+
+    Embedded ID3v2 tags are skipped, and other garbage between frames is skipped
+    by resynchronising on the next header that is followed by another valid one.
+    """
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 4 <= end:
+        header = parse_header(data, offset)
+        if header and offset + header.length <= end:
+            yield offset, header
+            offset += header.length
+            continue
+
+        # Segments joined naively carry an ID3 tag each
+        tag_size = id3v2_size(data[offset:offset + 10])
+        if tag_size:
+            offset += tag_size
+            continue
+
+        # Lost sync: look for the next plausible frame
+        offset = _resync(data, offset + 1, end)
+        if offset is None:
+            return
+
+
+def scan_stream(data) -> Dict:
+    """Duration, bitrates and integrity of an MP3 from its frame headers alone
+
+    Nothing is decoded: each header gives the frame length, so the scan jumps
+    from header to header. `partial_frame` is set when the data ends inside a
+    frame, and `declared_frames` is the count written in a Xing/Info/VBRI
+    frame, which a complete file matches.
+    """
+    start = id3v2_size(data[:10])
+    end = len(data) - trailing_tags_size(data)
+    frames = samples = audio_bytes = 0
+    sample_rate = 0
+    bitrates: Dict[int, int] = {}
+    sample_rates: Dict[int, int] = {}
+    declared_frames = declared_bytes = None
+    framed_bytes = 0
+    last_end = start
+    for offset, header in iter_frames(data, start, end):
+        framed_bytes += header.length
+        last_end = offset + header.length
+        if frames == 0 and declared_frames is None and is_info_frame(data, offset, header):
+            declared_frames, declared_bytes = info_frame_totals(data, offset, header)
+            continue
+        frames += 1
+        samples += header.samples
+        audio_bytes += header.length
+        sample_rate = sample_rate or header.sample_rate
+        bitrates[header.bitrate] = bitrates.get(header.bitrate, 0) + 1
+        sample_rates[header.sample_rate] = sample_rates.get(header.sample_rate, 0) + 1
+
+    tail = parse_header(data, last_end)
+    duration = samples / sample_rate if sample_rate else 0.0
+    return {
+        'frames': frames,
+        'duration_seconds': round(duration, 3),
+        'bitrate_kbps': round(audio_bytes * 8 / duration / 1000) if duration else 0,
+        'sample_rate': sample_rate,
+        'bitrates': bitrates,
+        'sample_rates': sample_rates,
+        'declared_frames': declared_frames,
+        'declared_bytes': declared_bytes,
+        'unframed_bytes': max(0, end - start - framed_bytes),
+        'partial_frame': bool(tail and last_end + tail.length > end),
+    }
+
+
+def scan_file(path) -> Dict:
+    """scan_stream() over a memory-mapped file, without copying it into memory"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return scan_stream(b'')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return scan_stream(data)
+
+
+def read_frames(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, FrameHeader]]:
+    """Yield (frame bytes, header) from a seekable file, one frame at a time
+
+    Memory use is bounded by the frame size (or the resync window), not the file.
+    """
+    offset = start
+    f.seek(offset)
+    while offset + 4 <= end:
+        head = f.read(4)
+        header = parse_header(head)
+        if header and offset + header.length <= end:
+            yield head + f.read(header.length - 4), header
+            offset += header.length
+            continue
+
+        # Embedded ID3 tag or lost sync: skip ahead within a bounded window
+        window = head + f.read(RESYNC_WINDOW)
+        skip = id3v2_size(window[:10])
+        if not skip:
+            found = _resync(window, 1, min(len(window), end - offset))
+            skip = found if found is not None else max(1, len(window) - 3)
+        offset += skip
+        f.seek(offset)
+
+
+def _resync(data, offset: int, end: int) -> Optional[int]:
+    """Find the next offset holding a frame header confirmed by the following one"""
+    while offset + 4 <= end:
+        header = parse_header(data, offset)
+        if header and offset + header.length <= end:
+            following = offset + header.length
+            if following + 4 > end or parse_header(data, following):
+                return offset
+        offset += 1
+    return None
+
+
+def _xing_frame(header: FrameHeader, frame_count: int, total_bytes: int, toc: bytes, vbr: bool) -> bytes:
+    """Build a Xing/Info metadata frame matching the stream's format"""
+    side_info = side_info_size(header.version, header.channel_mode)
+    payload = struct.pack('>4sIII', b'Xing' if vbr else b'Info', 0x0F, frame_count, total_bytes) + toc + bytes(4)
+    needed = 4 + side_info + len(payload)
+
+    # Smallest bitrate whose frame can hold the tag
+    bitrates = MPEG1_BITRATES if header.version == 3 else MPEG2_BITRATES
+    for bitrate in bitrates[1:]:
+        if frame_length(header.version, bitrate, header.sample_rate) >= needed:
+            break
+    frame_header = build_header(header.sample_rate, bitrate,
+                                channels=1 if header.channel_mode == CHANNEL_MODE_MONO else 2)
+    size = frame_length(header.version, bitrate, header.sample_rate)
+    return (frame_header + bytes(side_info) + payload).ljust(size, b'\x00')
+
+
+def xing_frame_size(header: FrameHeader) -> int:
+    """Size of the Xing/Info frame written for a stream with this format"""
+    return len(_xing_frame(header, 0, 0, bytes(100), False))
+
+
+class Mp3Concatenator:
+    """Splice MP3 segments into a file at frame level
+
+    Per-segment ID3/APE tags and Xing/Info/VBRI frames are dropped, silence is
+    spliced in from cached pre-encoded frames, and a single Info header
+    describing the whole file is written in front. Frames are written to the
+    output as they are read, so memory stays bounded by the frame size; the
+    header slot is reserved up front and filled in by `finish()`, which needs
+    a seekable output.
+    """
+
+    def __init__(self, f: BinaryIO):
+        """Start writing a stream to a binary file object"""
+        self.header: Optional[FrameHeader] = None
+        self._f = f
+        self._frame_sizes = array('I')
+        self._bitrates = set()
+
+    @property
+    def frame_count(self) -> int:
+        """Number of audio frames written so far"""
+        return len(self._frame_sizes)
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds of the audio written so far"""
+        if not self.header:
+            return 0.0
+        return self.frame_count * self.header.samples / self.header.sample_rate
+
+    def _accept(self, header: FrameHeader):
+        """Check a frame's format, reserving the Info frame slot on the first one"""
+        if self.header is None:
+            self.header = header
+            self._start = self._f.tell()
+            self._f.write(bytes(xing_frame_size(header)))
+        elif header.format != self.header.format:
+            raise ValueError(f"Cannot concatenate {header.sample_rate} Hz audio onto a "
+                             f"{self.header.sample_rate} Hz stream")
+        self._frame_sizes.append(header.length)
+        self._bitrates.add(header.bitrate)
+
+    def add(self, data: bytes):
+        """Append the audio frames of an in-memory MP3 segment"""
+        view = memoryview(data)
+        start = id3v2_size(view)
+        end = len(view) - trailing_tags_size(view)
+
+        # Contiguous frames are written as one slice
+        run_start = run_end = None
+        for offset, header in iter_frames(view, start, end):
+            if is_info_frame(view, offset, header):
+                continue
+            self._accept(header)
+            if run_end != offset:
+                if run_start is not None:
+                    self._f.write(view[run_start:run_end])
+                run_start = offset
+            run_end = offset + header.length
+
+        if run_start is not None:
+            self._f.write(view[run_start:run_end])
+
+    def add_file(self, path):
+        """Append the audio frames of an MP3 file without loading it whole"""
+        with open(path, 'rb') as f:
+            size = f.seek(0, 2)
+            f.seek(0)
+            start = id3v2_size(f.read(10))
+            f.seek(max(0, size - 160))
+            end = size - trailing_tags_size(f.read())
+
+            for frame, header in read_frames(f, start, end):
+                if is_info_frame(frame, 0, header):
+                    continue
+                self._accept(header)
+                self._f.write(frame)
+
+    def add_silence(self, duration_seconds: float, sample_rate: int = 44100, bitrate: int = 128,
+                    channels: int = 1):
+        """Append silence, matching the stream format once one is known"""
+        if self.header:
+            sample_rate = self.header.sample_rate
+            channels = 1 if self.header.channel_mode == CHANNEL_MODE_MONO else 2
+            # Lowest bitrate valid for this MPEG version: silence needs no data
+            bitrates = MPEG1_BITRATES if self.header.version == 3 else MPEG2_BITRATES
+            bitrate = bitrates[1]
+        data = silence(duration_seconds, sample_rate, bitrate, channels)
+        if data:
+            self.add(data)
+
+    def _toc(self, total_bytes: int, header_size: int) -> bytes:
+        """Xing seek table: file position (0-255) at each percent of duration"""
+        positions = []
+        frame_count = self.frame_count
+        offset = header_size
+        frame = 0
+        for percent in range(100):
+            target = percent * frame_count // 100
+            while frame < target:
+                offset += self._frame_sizes[frame]
+                frame += 1
+            positions.append(min(255, offset * 256 // total_bytes))
+        return bytes(positions)
+
+    def finish(self):
+        """Fill in the Info header now that the whole stream is known"""
+        if self.header is None:
+            raise ValueError("No MP3 frames to write")
+
+        header_size = xing_frame_size(self.header)
+        total_bytes = header_size + sum(self._frame_sizes)
+        xing = _xing_frame(self.header, self.frame_count, total_bytes,
+                           self._toc(total_bytes, header_size), vbr=len(self._bitrates) > 1)
+
+        end = self._f.tell()
+        self._f.seek(self._start)
+        self._f.write(xing)
+        self._f.seek(end)
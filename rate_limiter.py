@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiting with adaptive, Retry-After-aware backoff
+One limiter per API provider is shared by every thread making requests to it
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import httpx
+
+# Status codes that are worth retrying
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Status and headers of the latest failed response on each thread, for SDK errors that
+# do not carry the response (the ElevenLabs SDK raises ApiError(status_code, body) only)
+_failed_responses = threading.local()
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10):
+        """Allow `per_minute` units per minute with bursts of `burst_seconds` worth"""
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.scale = 1.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill (lock held)"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate * self.scale)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1) -> bool:
+        """Take `amount` units if available right now, without blocking"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return True
+            return False
+
+    def acquire(self, amount: float = 1):
+        """Block until `amount` units are available, then take them"""
+        # Requests larger than the bucket wait for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / (self.rate * self.scale)
+            time.sleep(min(wait, 1.0))
+
+
+def status_code_of(error: Exception) -> Optional[int]:
+    """HTTP status code carried by an SDK or httpx exception, if any"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def record_failed_response(response: httpx.Response):
+    """httpx response event hook: keep a failed response's headers for retry_after_of"""
+    if response.status_code >= 400:
+        _failed_responses.latest = (response.status_code, response.headers)
+
+
+def retry_after_of(error: Exception) -> Optional[float]:
+    """Seconds to wait according to the Retry-After headers of a failed response
+    
+    Errors without the response fall back to the last failed response
+    recorded on this thread by `record_failed_response`, if its status matches.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or getattr(error, 'headers', None)
+    if not headers:
+        status, recorded = getattr(_failed_responses, 'latest', None) or (None, None)
+        if status is None or status != status_code_of(error):
+            return None
+        headers = recorded
+
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        # HTTP-date form
+        parsed = email.utils.parsedate_to_datetime(retry_after)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed request should be retried"""
+    status = status_code_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    # SDK wrappers such as openai.APIConnectionError / APITimeoutError
+    name = type(error).__name__
+    return 'Connection' in name or 'Timeout' in name
+
+
+class ProviderRateLimiter:
+    """Request and usage budgets for one provider, with retries
+
+    Throttling responses halve the effective rate and pause every caller until
+    the provider's Retry-After has passed; each success then restores the rate
+    a little, so throughput settles just under the real quota.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, units_per_minute: Optional[float] = None,
+                 max_retries: int = 3, retry_delay: float = 1.0, max_retry_delay: float = 60.0,
+                 logger: Optional[logging.Logger] = None):
+        """Create a limiter; `units` are tokens for OpenAI and characters for ElevenLabs"""
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.units = TokenBucket(units_per_minute) if units_per_minute else None
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.logger = logger or logging.getLogger('VoiceDemoGenerator')
+
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.retries = 0
+        self.throttled = 0
+
+    def _set_scale(self, scale: float):
+        """Scale the refill rate of every bucket (lock held)"""
+        for bucket in (self.requests, self.units):
+            if bucket:
+                bucket.scale = scale
+
+    def _wait_for_pause(self):
+        """Block while a provider-requested pause is in effect"""
+        while True:
+            with self._lock:
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def acquire(self, units: float = 0):
+        """Wait for budget for one request using `units` of usage"""
+        self._wait_for_pause()
+        self.requests.acquire(1)
+        if self.units and units:
+            self.units.acquire(units)
+
+    def _on_success(self):
+        """Recover the rate additively after a successful request"""
+        with self._lock:
+            if self.requests.scale < 1.0:
+                self._set_scale(min(1.0, self.requests.scale + 0.05))
+
+    def _on_throttled(self, delay: float):
+        """Cut the rate and pause all callers after a 429"""
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            # Concurrent requests rejected in the same burst only count once
+            if self._paused_until <= now:
+                self._set_scale(max(0.1, self.requests.scale * 0.5))
+            self._paused_until = max(self._paused_until, now + delay)
+
+    def call(self, func: Callable, *args, units: float = 0, usage: Optional[Dict] = None, **kwargs):
+        """Call `func` within the budget, retrying throttled and transient failures
+
+        When `usage` is given, the attempts made, retries and seconds spent waiting
+        for budget or backing off are added to it.
+        """
+        usage = usage if usage is not None else {}
+        for key in ('attempts', 'retries', 'wait_seconds', 'backoff_seconds'):
+            usage.setdefault(key, 0)
+
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            self.acquire(units)
+            usage['wait_seconds'] += time.monotonic() - started
+            usage['attempts'] += 1
+            # Only a response failing during this attempt may explain its error
+            _failed_responses.latest = None
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+
+                # Exponential backoff with full jitter, never shorter than Retry-After
+                backoff = random.uniform(0, min(self.max_retry_delay, self.retry_delay * 2 ** attempt))
+                retry_after = retry_after_of(e)
+                delay = max(backoff, retry_after or 0.0)
+
+                if status_code_of(e) == 429:
+                    self._on_throttled(delay)
+
+                with self._lock:
+                    self.retries += 1
+                usage['retries'] += 1
+                usage['backoff_seconds'] += delay
+                self.logger.warning(f"{self.name} request failed ({str(e)[:200]}), "
+                                    f"retrying in {delay:.1f}s (attempt {attempt + 2}/{self.max_retries + 1})")
+                time.sleep(delay)
+                continue
+
+            self._on_success()
+            return result
+
+    def stats(self) -> Dict:
+        """Counters for the generation report"""
+        with self._lock:
+            return {
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'rate_scale': round(self.requests.scale, 3),
+            }
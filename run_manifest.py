@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Persistent run manifest for voice demo generation
+Records the outcome of every industry as soon as it finishes, across runs and batches
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+
+class RunManifest:
+    """JSON manifest of per-industry results, updated atomically
+
+    Every update re-reads the file under an exclusive lock before writing, so
+    separate batch processes sharing one output directory merge their results
+    instead of overwriting each other.
+    """
+
+    def __init__(self, path: Path):
+        """Use the manifest at `path` (created on first update)"""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the in-process and cross-process locks"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.path}.lock", 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict:
+        """Load the manifest from disk"""
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'industries': {}}
+
+    def _write(self, data: Dict, path: Optional[Path] = None):
+        """Replace the manifest (or another file at `path`) atomically"""
+        path = path or self.path
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+
+    def update(self, industry: str, entry: Dict):
+        """Record the latest outcome for one industry"""
+        with self._locked():
+            data = self._read()
+            data['industries'][industry] = dict(entry, updated_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+            self._write(data)
+
+    def entries(self) -> Dict[str, Dict]:
+        """All recorded industries"""
+        with self._locked():
+            return self._read()['industries']
+
+    def get(self, industry: str) -> Optional[Dict]:
+        """The recorded outcome for an industry, if any"""
+        return self.entries().get(industry)
+
+    def build_report(self, catalogue: List[str], entries: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Merge all recorded outcomes into a report covering the whole catalogue"""
+        entries = self.entries() if entries is None else entries
+
+        # Catalogue order first, then anything generated outside the catalogue
+        ordered = list(catalogue) + [industry for industry in entries if industry not in catalogue]
+
+        report = {
+            'success': [],
+            'failed': [],
+            'pending': [],
+            'total': len(ordered)
+        }
+        for industry in ordered:
+            entry = entries.get(industry)
+            if entry is None:
+                report['pending'].append(industry)
+            elif entry['status'] == 'success':
+                report['success'].append({
+                    'industry': industry,
+                    'audio_file': entry['audio_file'],
+                    'script_file': entry['script_file']
+                })
+            else:
+                report['failed'].append(industry)
+        
+        return report
+    
+    def write_report(self, path: Path, catalogue: List[str], sections: Callable[[Dict[str, Dict]], Dict]) -> Dict:
+        """Build the catalogue report and replace `path` with it, under the manifest lock
+        
+        `sections` returns the report's other top-level keys from the recorded
+        entries. Processes sharing an output directory each write the report
+        when they finish; holding the lock means each one reflects every
+        outcome recorded so far, so an earlier view never replaces a later one.
+        """
+        with self._locked():
+            entries = self._read()['industries']
+            report = self.build_report(catalogue, entries)
+            report.update(sections(entries))
+            self._write(report, Path(path))
+        return report
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing, usage and cost instrumentation for generation runs
+Spans are timed with monotonic clocks and can be exported as a Chrome trace
+(viewable in chrome://tracing or Perfetto)
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Per-industry usage counters
+COUNTERS = (
+    'prompt_tokens', 'completion_tokens', 'batch_prompt_tokens', 'batch_completion_tokens',
+    'openai_requests', 'characters_billed',
+    'tts_requests', 'cache_hits', 'retries', 'wait_seconds', 'backoff_seconds', 'fallbacks',
+    'script_regenerations', 'estimated_seconds', 'estimated_characters',
+)
+
+# Counters measured in seconds, rounded in summaries
+SECONDS_COUNTERS = ('wait_seconds', 'backoff_seconds', 'estimated_seconds')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class RunMetrics:
+    """Thread-safe collector of spans, counters and events for one run"""
+
+    def __init__(self, pricing: Optional[Dict] = None):
+        """Start a run; `pricing` is the config's pricing section"""
+        self.pricing = pricing or {}
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+        self._spans: List[Dict] = []
+        self._events: List[Dict] = []
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._annotations: Dict[str, Dict] = {}
+
+    @contextmanager
+    def span(self, name: str, industry: Optional[str] = None, **attrs):
+        """Time a block of work; attributes can be added to the yielded dict"""
+        record = dict(attrs)
+        started = time.monotonic()
+        try:
+            yield record
+        finally:
+            ended = time.monotonic()
+            with self._lock:
+                self._spans.append({
+                    'name': name,
+                    'industry': industry,
+                    'start': started - self.started,
+                    'duration': ended - started,
+                    'thread': threading.get_ident(),
+                    'attrs': record,
+                })
+
+    def add(self, industry: Optional[str], **counters):
+        """Add to an industry's counters (None for work shared by the whole run)"""
+        with self._lock:
+            totals = self._counters.setdefault(industry, dict.fromkeys(COUNTERS, 0))
+            for key, value in counters.items():
+                totals[key] = totals.get(key, 0) + value
+
+    def annotate(self, industry: str, **values):
+        """Attach descriptive values (such as script estimates) to an industry"""
+        with self._lock:
+            self._annotations.setdefault(industry, {}).update(values)
+
+    def event(self, name: str, industry: Optional[str] = None, **attrs):
+        """Record a point-in-time event such as a fallback to the template script"""
+        with self._lock:
+            self._events.append({
+                'name': name,
+                'industry': industry,
+                'time': time.monotonic() - self.started,
+                'thread': threading.get_ident(),
+                'attrs': attrs,
+            })
+
+    def finish(self):
+        """Mark the end of the run"""
+        self.finished = time.monotonic()
+
+    def estimate_cost(self, counters: Dict) -> Dict:
+        """Estimated spend in USD for a set of counters"""
+        openai_pricing = self.pricing.get('openai', {})
+        elevenlabs_pricing = self.pricing.get('elevenlabs', {})
+        prompt_price = openai_pricing.get('prompt_per_1m_tokens', 0)
+        completion_price = openai_pricing.get('completion_per_1m_tokens', 0)
+        batch_discount = openai_pricing.get('batch_discount', 0.5)
+        openai_cost = (counters.get('prompt_tokens', 0) * prompt_price
+                       + counters.get('completion_tokens', 0) * completion_price
+                       + (counters.get('batch_prompt_tokens', 0) * prompt_price
+                          + counters.get('batch_completion_tokens', 0) * completion_price) * (1 - batch_discount)) / 1e6
+        elevenlabs_cost = counters.get('characters_billed', 0) * elevenlabs_pricing.get('per_1k_characters', 0) / 1e3
+        return {
+            'openai': round(openai_cost, 4),
+            'elevenlabs': round(elevenlabs_cost, 4),
+            'total': round(openai_cost + elevenlabs_cost, 4),
+        }
+
+    @staticmethod
+    def _stage_stats(durations: List[float]) -> Dict:
+        """Aggregate statistics for one stage"""
+        return {
+            'count': len(durations),
+            'total_seconds': round(sum(durations), 3),
+            'p50_ms': round(percentile(durations, 50) * 1000, 1),
+            'p95_ms': round(percentile(durations, 95) * 1000, 1),
+            'max_ms': round(max(durations) * 1000, 1) if durations else 0.0,
+        }
+
+    def industry_summary(self, industry: str) -> Dict:
+        """Timings, usage and cost for one industry"""
+        with self._lock:
+            spans = [span for span in self._spans if span['industry'] == industry]
+            counters = dict(self._counters.get(industry, dict.fromkeys(COUNTERS, 0)))
+            events = [event['name'] for event in self._events if event['industry'] == industry]
+            annotations = dict(self._annotations.get(industry, {}))
+
+        stages: Dict[str, float] = {}
+        tts_lines = []
+        for span in spans:
+            stages[span['name']] = round(stages.get(span['name'], 0.0) + span['duration'], 3)
+            if span['name'] == 'tts_line':
+                tts_lines.append(dict(span['attrs'], seconds=round(span['duration'], 3)))
+
+        for key in SECONDS_COUNTERS:
+            counters[key] = round(counters[key], 3)
+        return {
+            **annotations,
+            'stage_seconds': stages,
+            'tts_lines': sorted(tts_lines, key=lambda line: (line.get('line') or 0, line.get('unit') or 0)),
+            'usage': counters,
+            'events': events,
+            'estimated_cost_usd': self.estimate_cost(counters),
+        }
+
+    def run_summary(self) -> Dict:
+        """Run-level totals, stage percentiles and estimated cost"""
+        with self._lock:
+            spans = list(self._spans)
+            per_industry = [dict(counters) for counters in self._counters.values()]
+            industries = sum(1 for industry in self._counters if industry is not None)
+            events = list(self._events)
+
+        totals = dict.fromkeys(COUNTERS, 0)
+        for counters in per_industry:
+            for key, value in counters.items():
+                totals[key] = totals.get(key, 0) + value
+        for key in SECONDS_COUNTERS:
+            totals[key] = round(totals[key], 3)
+
+        by_stage: Dict[str, List[float]] = {}
+        for span in spans:
+            by_stage.setdefault(span['name'], []).append(span['duration'])
+
+        ended = self.finished or time.monotonic()
+        event_counts: Dict[str, int] = {}
+        for event in events:
+            event_counts[event['name']] = event_counts.get(event['name'], 0) + 1
+
+        return {
+            'wall_seconds': round(ended - self.started, 3),
+            'industries': industries,
+            'totals': totals,
+            'stages': {stage: self._stage_stats(durations) for stage, durations in by_stage.items()},
+            'events': event_counts,
+            'estimated_cost_usd': self.estimate_cost(totals),
+        }
+
+    def write_trace(self, path: str):
+        """Write spans and events in Chrome trace event format"""
+        with self._lock:
+            spans = list(self._spans)
+            events = list(self._events)
+
+        pid = os.getpid()
+        trace_events = []
+        for span in spans:
+            trace_events.append({
+                'name': span['name'],
+                'cat': 'stage',
+                'ph': 'X',
+                'ts': round(span['start'] * 1e6),
+                'dur': round(span['duration'] * 1e6),
+                'pid': pid,
+                'tid': span['thread'],
+                'args': dict(span['attrs'], industry=span['industry']),
+            })
+        for event in events:
+            trace_events.append({
+                'name': event['name'],
+                'cat': 'event',
+                'ph': 'i',
+                's': 't',
+                'ts': round(event['time'] * 1e6),
+                'pid': pid,
+                'tid': event['thread'],
+                'args': dict(event['attrs'], industry=event['industry']),
+            })
+
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
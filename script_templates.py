@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Precompiled conversation templates and bulk offline script generation
+Templates from conversation_templates.json are parsed once into literal/slot
+lists, so rendering a script is a single join per line. The bulk mode writes
+seeded, reproducible script variants to JSONL across all cores without any
+network calls.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from multiprocessing import Pool
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+import yaml
+
+# Turns in conversation order: the speaker and the template sections joined into the turn.
+# Calls are inbound, so the receptionist answers and the caller's greeting leads into the inquiry.
+SCRIPT_TURNS = [
+    ('AI Receptionist', ['receptionist_greeting']),
+    ('Customer', ['greeting', 'service_inquiry']),
+    ('AI Receptionist', ['receptionist_service_response']),
+    ('Customer', ['booking_request']),
+    ('AI Receptionist', ['receptionist_availability']),
+    ('Customer', ['customer_selection']),
+    ('AI Receptionist', ['receptionist_confirmation']),
+    ('Customer', ['customer_details']),
+    ('AI Receptionist', ['receptionist_final_confirmation']),
+    ('Customer', ['customer_closing']),
+    ('AI Receptionist', ['receptionist_closing']),
+]
+
+SLOT_PATTERN = re.compile(r'\{(\w+)\}')
+
+# Variants rendered per worker task in bulk mode
+BULK_CHUNK_SIZE = 250
+
+
+class CompiledTemplate:
+    """A template split once into literal text and slot names"""
+
+    __slots__ = ('literals', 'slots')
+
+    def __init__(self, text: str):
+        """Parse `{name}` slots out of `text`"""
+        parts = SLOT_PATTERN.split(text)
+        self.literals = parts[0::2]
+        self.slots = parts[1::2]
+
+    def render(self, context: Dict) -> str:
+        """Fill the slots from `context`; unknown slots are left as written"""
+        parts = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            parts.append(str(context[slot]) if slot in context else f"{{{slot}}}")
+            parts.append(literal)
+        return ''.join(parts)
+
+
+def generic_context(industry: str, rng) -> Dict:
+    """Generate a generic context for industries without specific templates"""
+    industry_lower = industry.lower()
+
+    # Determine appropriate suffix based on industry type
+    if any(x in industry_lower for x in ['clinic', 'doctor', 'dentist', 'chiropractor', 'medical', 'therapy']):
+        suffix = "Clinic"
+    elif any(x in industry_lower for x in ['studio', 'gym', 'yoga', 'dance', 'martial']):
+        suffix = "Studio"
+    elif any(x in industry_lower for x in ['shop', 'store', 'bakery', 'florist', 'pharmacy']):
+        suffix = "Shop"
+    elif any(x in industry_lower for x in ['restaurant', 'cafe', 'coffee', 'bar', 'pizza']):
+        suffix = ""  # Often just the name
+    elif any(x in industry_lower for x in ['school', 'academy', 'university', 'college']):
+        suffix = "Academy"
+    elif any(x in industry_lower for x in ['agency', 'firm', 'consultant']):
+        suffix = "Group"
+    else:
+        suffix = "Services"
+
+    # Create a realistic business name
+    prefixes = ["City", "Elite", "Premier", "Advanced", "Total", "Modern", "Expert", "Quality"]
+    prefix = rng.choice(prefixes)
+
+    business_name = f"{prefix} {industry}"
+    if suffix and suffix not in industry:
+        business_name += f" {suffix}"
+
+    # Handle singular/plural
+    if business_name.endswith("s Services"):
+        business_name = business_name[:-10] + " Services"
+
+    service_type = industry_lower.replace(' services', '').replace(' companies', '')
+
+    return {
+        'business_name': business_name,
+        'service_type': service_type,
+        'specific_need': f"{service_type}",
+        'service_category': industry_lower,
+        'service_list': f"consultations, appointments, and specialized {industry_lower} services",
+        'recommended_service': f"our most popular {service_type} package"
+    }
+
+
+class TemplateEngine:
+    """Renders template scripts from templates compiled at load time"""
+
+    def __init__(self, templates: Dict, conversation: Dict):
+        """Compile every template section; `conversation` is the config's conversation section"""
+        self.turns = [
+            (speaker, [(section, [CompiledTemplate(text) for text in templates[section]]) for section in sections])
+            for speaker, sections in SCRIPT_TURNS
+        ]
+        self.predefined = templates.get('industry_contexts', {})
+        self.conversation = conversation
+        self.customer_names = conversation.get('customer_names') or ['James Martinez']
+        self._contexts: Dict[str, Dict] = {}
+
+    def industry_context(self, industry: str, rng: Optional[random.Random] = None) -> Dict:
+        """Context for an industry, computed once (do not modify the returned dict)
+
+        Generic business names are seeded from the industry by default, so the
+        same industry gets the same name (and GPT prompt) in every run.
+        """
+        context = self._contexts.get(industry)
+        if context is None:
+            # Check if we have a predefined context, else generate a generic one
+            context = self.predefined.get(industry) or generic_context(industry, rng or random.Random(industry))
+            # The first context computed wins if threads race
+            context = self._contexts.setdefault(industry, dict(context))
+        return context
+
+    def render(self, context: Dict, rng=random, customer_name: Optional[str] = None) -> str:
+        """Render one script for an industry context"""
+        values = dict(self.conversation)
+        values.update(context)
+        values['customer_name'] = customer_name or rng.choice(self.customer_names)
+        values['confirmation_code'] = f"VIG{rng.randint(1000, 9999)}"
+        values['selected_day'] = values.get('day1')
+        values['selected_time'] = values.get('time1')
+
+        lines = []
+        for speaker, sections in self.turns:
+            parts = []
+            for section, options in sections:
+                template = rng.choice(options)
+                if section == 'customer_selection':
+                    # The receptionist confirms whichever slot the customer picked
+                    for slot in template.slots:
+                        if slot.startswith('day') and slot[3:].isdigit():
+                            values['selected_day'] = values.get(slot)
+                            values['selected_time'] = values.get(f"time{slot[3:]}")
+                            break
+                parts.append(template.render(values))
+            lines.append(f"{speaker}: {' '.join(parts)}")
+
+        return "\n\n".join(lines)
+
+
+_worker_engine: Optional[TemplateEngine] = None
+
+
+def _init_worker(templates: Dict, conversation: Dict):
+    """Compile the templates once per worker process"""
+    global _worker_engine
+    _worker_engine = TemplateEngine(templates, conversation)
+
+
+def variant_rng(seed: int, industry: str, variant: int) -> random.Random:
+    """Random source for one variant, independent of how work is split"""
+    return random.Random(f"{seed}:{industry}:{variant}")
+
+
+def render_variants(engine: TemplateEngine, industry: str, start: int, stop: int, seed: int) -> Iterator[Dict]:
+    """Yield variants `start` to `stop - 1` for one industry"""
+    # Generic business names come from the seed too, so every variant agrees on them
+    context = engine.industry_context(industry, random.Random(f"{seed}:{industry}"))
+    for variant in range(start, stop):
+        rng = variant_rng(seed, industry, variant)
+        customer_name = rng.choice(engine.customer_names)
+        yield {
+            'industry': industry,
+            'variant': variant,
+            'seed': seed,
+            'business_name': context['business_name'],
+            'customer_name': customer_name,
+            'script': engine.render(context, rng, customer_name),
+        }
+
+
+def _render_chunk(task: Tuple[str, int, int, int]) -> str:
+    """Render a chunk of variants as JSONL (runs in a worker process)"""
+    industry, start, stop, seed = task
+    return ''.join(json.dumps(record) + '\n' for record in render_variants(_worker_engine, industry, start, stop, seed))
+
+
+def bulk_generate(output: IO[str], templates: Dict, conversation: Dict, industries: List[str],
+                  variants: int, seed: int = 0, workers: Optional[int] = None) -> int:
+    """Stream `variants` scripts per industry to `output` as JSONL; returns the number written
+
+    Output order and content depend only on the inputs and seed, not on the
+    number of workers.
+    """
+    tasks = [
+        (industry, start, min(start + BULK_CHUNK_SIZE, variants), seed)
+        for industry in industries
+        for start in range(0, variants, BULK_CHUNK_SIZE)
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(templates, conversation)
+        for task in tasks:
+            output.write(_render_chunk(task))
+    else:
+        with Pool(workers, initializer=_init_worker, initargs=(templates, conversation)) as pool:
+            for chunk in pool.imap(_render_chunk, tasks):
+                output.write(chunk)
+
+    return len(industries) * variants
+
+
+def main():
+    """Generate template script variants offline"""
+    parser = argparse.ArgumentParser(description='Generate seeded template script variants to JSONL (no API calls)')
+    parser.add_argument('--industries', type=str, help='Comma-separated list of industries (default: all)')
+    parser.add_argument('--variants', type=int, default=100, help='Variants per industry')
+    parser.add_argument('--seed', type=int, default=0, help='Seed; the same seed reproduces the same scripts')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    parser.add_argument('--output', type=str, default='output/template_scripts.jsonl',
+                        help="JSONL file to write, or '-' for stdout")
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to config file')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        conversation = yaml.safe_load(f)['conversation']
+    with open('conversation_templates.json', 'r') as f:
+        templates = json.load(f)
+
+    if args.industries:
+        industries = [i.strip() for i in args.industries.split(',')]
+    else:
+        with open('industries.json', 'r') as f:
+            industries = json.load(f)
+
+    started = time.monotonic()
+    if args.output == '-':
+        count = bulk_generate(sys.stdout, templates, conversation, industries, args.variants, args.seed, args.workers)
+    else:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            count = bulk_generate(f, templates, conversation, industries, args.variants, args.seed, args.workers)
+    elapsed = time.monotonic() - started
+
+    print(f"Wrote {count} scripts for {len(industries)} industries in {elapsed:.1f}s "
+          f"({count / max(elapsed, 1e-9):.0f} scripts/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
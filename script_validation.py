@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Script parsing, validation and spoken-duration estimates
+Runs before any TTS request so malformed or badly sized scripts can be
+regenerated while they are still cheap to replace
+"""
+
+import re
+from typing import Dict, List, NamedTuple
+
+# Speaker labels as they appear in scripts, optionally wrapped in markdown bold
+SPEAKER_LABEL = re.compile(r'^\s*(?:\*\*)?(AI Receptionist|Receptionist|Customer)(?:\*\*)?\s*:\s*(?:\*\*)?\s*',
+                           re.IGNORECASE)
+
+# Average characters per spoken word, including the following space
+CHARACTERS_PER_WORD = 5.7
+
+# End of a sentence: closing punctuation, then whitespace before a capital, digit or quote
+SENTENCE_BREAK = re.compile(r'([.!?]+)["\')\]]*\s+(?=["\'(]?[A-Z0-9])')
+
+# Points inside a sentence where a speaker naturally pauses
+PHRASE_BREAK = re.compile(r'(?<=[,;:])\s+|\s+[-\u2013\u2014]+\s+')
+
+# Words ending in a full stop that do not end a sentence
+ABBREVIATIONS = {'mr.', 'mrs.', 'ms.', 'dr.', 'st.', 'jr.', 'sr.', 'vs.', 'etc.', 'e.g.', 'i.e.', 'a.m.', 'p.m.'}
+
+
+class Turn(NamedTuple):
+    """One speaker's line of dialogue"""
+    speaker: str  # 'customer' or 'receptionist'
+    text: str
+
+
+class ScriptCheck(NamedTuple):
+    """Parsed turns, problems found and the size estimate for one script"""
+    turns: List[Turn]
+    problems: List[str]
+    estimate: Dict
+
+    @property
+    def valid(self) -> bool:
+        return not self.problems
+
+
+def parse_turns(script: str) -> List[Turn]:
+    """Split a script into turns
+
+    Turns may be separated by blank lines or single newlines; lines without a
+    speaker label continue the previous turn. Text before the first label, such
+    as a preamble from the model, is not spoken and is ignored.
+    """
+    turns: List[Turn] = []
+    for line in script.strip().splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = SPEAKER_LABEL.match(line)
+        if match:
+            speaker = 'customer' if match.group(1).lower() == 'customer' else 'receptionist'
+            turns.append(Turn(speaker, line[match.end():].strip()))
+        elif turns:
+            speaker, text = turns[-1]
+            turns[-1] = Turn(speaker, f"{text} {line}".strip())
+    return [turn for turn in turns if turn.text]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split dialogue into sentences
+
+    Ellipses are pauses within a sentence and never end one, nor do common
+    abbreviations such as "Dr.".
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_BREAK.finditer(text):
+        words = text[start:match.end(1)].split()
+        if '..' in match.group(1) or (words and words[-1].lower() in ABBREVIATIONS):
+            continue
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    sentences.append(text[start:].strip())
+    return [sentence for sentence in sentences if sentence]
+
+
+def split_units(text: str, mode: str = 'turn', min_characters: int = 0) -> List[str]:
+    """Split a turn into TTS units: the whole 'turn', each 'sentence' or each 'phrase'
+
+    Units shorter than `min_characters` are joined to the previous unit (or the
+    next one at the start of a turn), so fillers such as "Okay." are not
+    synthesized on their own and whole sentences stay intact for reuse.
+    """
+    if mode == 'turn':
+        return [text]
+    if mode not in ('sentence', 'phrase'):
+        raise ValueError(f"Unknown segmentation mode: {mode}")
+
+    pieces = split_sentences(text)
+    if mode == 'phrase':
+        pieces = [phrase for sentence in pieces for phrase in PHRASE_BREAK.split(sentence) if phrase.strip()]
+
+    units: List[str] = []
+    pending = ''
+    for piece in pieces:
+        if len(piece) >= min_characters or units:
+            if len(piece) < min_characters:
+                units[-1] = f"{units[-1]} {piece}"
+            else:
+                units.append(f"{pending} {piece}" if pending else piece)
+                pending = ''
+        else:
+            pending = f"{pending} {piece}" if pending else piece
+    if pending:
+        units.append(pending)
+    return units
+
+
+class ScriptValidator:
+    """Checks scripts against the `validation` config section"""
+
+    def __init__(self, config: Dict, turn_gap_seconds: float = 0.5):
+        """Use the validation settings; `turn_gap_seconds` is the silence between turns"""
+        self.min_turns = config.get('min_turns', 8)
+        self.min_seconds = config.get('min_seconds', 50)
+        self.max_seconds = config.get('max_seconds', 180)
+        self.words_per_minute = config.get('words_per_minute', {})
+        self.ellipsis_pause = config.get('ellipsis_pause_seconds', 0.4)
+        self.turn_gap_seconds = turn_gap_seconds
+
+    def speaking_rate(self, speaker: str, voices: Dict[str, Dict]) -> float:
+        """Words per minute for a speaker's voice"""
+        voice = voices.get(speaker) or {}
+        return voice.get('words_per_minute') or self.words_per_minute.get(speaker) or 150
+
+    def spoken_seconds(self, speaker: str, text: str, voices: Dict[str, Dict]) -> float:
+        """Estimated time for a speaker's voice to say one turn"""
+        rate = self.speaking_rate(speaker, voices)
+        # Average the word-based and character-based estimates
+        by_words = len(text.split()) / rate * 60
+        by_characters = len(text) / (rate * CHARACTERS_PER_WORD) * 60
+        return (by_words + by_characters) / 2 + text.count('...') * self.ellipsis_pause
+
+    def estimate(self, turns: List[Turn], voices: Dict[str, Dict]) -> Dict:
+        """Estimated spoken length and billable characters of a script"""
+        seconds = 0.0
+        words = 0
+        characters = 0
+        for speaker, text in turns:
+            seconds += self.spoken_seconds(speaker, text, voices)
+            words += len(text.split())
+            characters += len(text)
+
+        seconds += max(0, len(turns) - 1) * self.turn_gap_seconds
+        return {
+            'turns': len(turns),
+            'words': words,
+            'billable_characters': characters,
+            'estimated_seconds': round(seconds, 1),
+        }
+
+    def check(self, script: str, voices: Dict[str, Dict]) -> ScriptCheck:
+        """Parse, validate and size a script"""
+        turns = parse_turns(script)
+        estimate = self.estimate(turns, voices)
+        problems = []
+
+        if len(turns) < self.min_turns:
+            problems.append(f"only {len(turns)} turns (need {self.min_turns})")
+        if turns and turns[0].speaker != 'receptionist':
+            problems.append("customer speaks first (the receptionist must answer the call)")
+        if {turn.speaker for turn in turns} != {'customer', 'receptionist'}:
+            problems.append("both speakers must have lines")
+        if estimate['estimated_seconds'] < self.min_seconds:
+            problems.append(f"about {estimate['estimated_seconds']:.0f}s long (minimum {self.min_seconds}s)")
+        elif estimate['estimated_seconds'] > self.max_seconds:
+            problems.append(f"about {estimate['estimated_seconds']:.0f}s long (maximum {self.max_seconds}s)")
+
+        return ScriptCheck(turns, problems, estimate)
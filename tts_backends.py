@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Text-to-speech backends
+Every segment is rendered through one backend, chosen by `tts.backend` in
+config.yaml: ElevenLabs for the real voices, or an offline draft renderer that
+keeps each line's spoken length, for previews and CI runs without network access
+"""
+
+import json
+import shlex
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+import mp3_tools
+from script_validation import ScriptValidator
+
+
+def parse_output_format(output_format: str) -> Tuple[int, int]:
+    """(sample rate, bitrate in kbps) of an ElevenLabs output format such as mp3_44100_128"""
+    _, sample_rate, bitrate = output_format.split('_')
+    return int(sample_rate), int(bitrate)
+
+
+class TTSBackend:
+    """Renders one segment of speech to an MP3 file"""
+
+    name = 'base'
+    # Requests go to a paid API: they are rate limited, billed and need connections
+    remote = False
+    # Rendered segments are worth keeping in the segment cache
+    cacheable = True
+
+    @property
+    def cache_name(self) -> str:
+        """Identifies this backend's output in cache keys and audio fingerprints"""
+        return self.name
+
+    def synthesize(self, text: str, voice_id: str, settings: Dict, output_format: str, dest: Path):
+        """Write the audio for `text` to `dest`"""
+        raise NotImplementedError
+
+
+class ElevenLabsBackend(TTSBackend):
+    """ElevenLabs text-to-speech through the SDK"""
+
+    name = 'elevenlabs'
+    remote = True
+
+    def __init__(self, client: Callable[[], object], model: str):
+        """`client` returns the SDK client, so the SDK is only imported once a line is synthesized"""
+        self._client = client
+        self.model = model
+
+    def synthesize(self, text: str, voice_id: str, settings: Dict, output_format: str, dest: Path):
+        from elevenlabs import VoiceSettings
+
+        audio = self._client().generate(
+            text=text,
+            voice=voice_id,
+            model=self.model,
+            voice_settings=VoiceSettings(**settings),
+            output_format=output_format
+        )
+        # Stream chunks to disk as they arrive instead of buffering the response
+        with open(dest, 'wb') as f:
+            for chunk in audio:
+                f.write(chunk)
+
+
+class DraftBackend(TTSBackend):
+    """Offline stand-in for the real voices, with their timing
+
+    Each segment lasts as long as the line is estimated to take to speak, at
+    the speaker's words-per-minute rate (as in script validation). In
+    'silence' mode segments are pre-encoded silence, so a whole catalogue
+    renders in seconds with the real turn structure and gaps. In 'command'
+    mode a local synthesizer renders audible drafts: `command` is a shell
+    command that writes an MP3 to {output}, with {text}, {voice},
+    {words_per_minute}, {sample_rate} and {bitrate} filled in.
+    """
+
+    name = 'draft'
+
+    def __init__(self, config: Dict, voices: Dict, validator: ScriptValidator):
+        """Use the `tts.draft` settings and the voice pools"""
+        self.mode = config.get('mode', 'silence')
+        if self.mode not in ('silence', 'command'):
+            raise ValueError(f"Unknown draft TTS mode: {self.mode}")
+        self.command = config.get('command')
+        if self.mode == 'command' and not self.command:
+            raise ValueError("tts.draft.command is required in command mode")
+        self.command_voices = config.get('voices', {})
+        self.validator = validator
+        self.speakers = {voice['voice_id']: ('customer', voice) for voice in voices['customer_pool']}
+        self.speakers.update({voice['voice_id']: ('receptionist', voice) for voice in voices['receptionist_pool']})
+        # Silence is cheaper to render than to read back, and would only crowd real voices out of the cache
+        self.cacheable = self.mode == 'command'
+
+    @property
+    def cache_name(self) -> str:
+        if self.mode == 'silence':
+            return 'draft:silence'
+        return 'draft:' + json.dumps({'command': self.command, 'voices': self.command_voices}, sort_keys=True)
+
+    def _speaker(self, voice_id: str) -> Tuple[str, Dict]:
+        """Speaker and pool entry of a voice (voices outside the pools speak as the receptionist)"""
+        return self.speakers.get(voice_id, ('receptionist', {}))
+
+    def seconds(self, text: str, voice_id: str) -> float:
+        """Estimated time for the voice to speak `text`"""
+        speaker, voice = self._speaker(voice_id)
+        return self.validator.spoken_seconds(speaker, text, {speaker: voice})
+
+    def synthesize(self, text: str, voice_id: str, settings: Dict, output_format: str, dest: Path):
+        sample_rate, bitrate = parse_output_format(output_format)
+        if self.mode == 'silence':
+            seconds = max(self.seconds(text, voice_id), 0.1)
+            dest.write_bytes(mp3_tools.silence(seconds, sample_rate, mp3_tools.lowest_bitrate(sample_rate)))
+            return
+
+        speaker, voice = self._speaker(voice_id)
+        values = {
+            'text': text,
+            'voice': self.command_voices.get(speaker, ''),
+            'words_per_minute': int(self.validator.speaking_rate(speaker, {speaker: voice})),
+            'sample_rate': sample_rate,
+            'bitrate': bitrate,
+            'output': str(dest),
+        }
+        command = self.command.format(**{key: shlex.quote(str(value)) for key, value in values.items()})
+        with tempfile.TemporaryFile() as stderr:
+            result = subprocess.run(command, shell=True, stdout=subprocess.DEVNULL, stderr=stderr, timeout=120)
+            if result.returncode:
+                stderr.seek(0)
+                raise RuntimeError(f"Draft TTS command failed ({result.returncode}): "
+                                   f"{stderr.read().decode('utf-8', 'replace').strip()[-300:]}")
+        if not dest.exists() or not mp3_tools.looks_like_mp3(dest.read_bytes()[:4]):
+            raise RuntimeError(f"Draft TTS command did not write an MP3 to {dest}")
+
+
+def create_backend(config: Dict, client: Callable[[], object], validator: ScriptValidator) -> TTSBackend:
+    """Build the backend named by `tts.backend` (ElevenLabs by default)"""
+    tts_config = config.get('tts', {})
+    name = tts_config.get('backend', 'elevenlabs')
+    if name == 'elevenlabs':
+        return ElevenLabsBackend(client, config['api']['model'])
+    if name == 'draft':
+        return DraftBackend(tts_config.get('draft', {}), config['voices'], validator)
+    raise ValueError(f"Unknown TTS backend: {name}")
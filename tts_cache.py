@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache for synthesized TTS segments
+Segments are keyed on everything that affects the audio, so identical lines are only paid for once
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def _link_or_copy(src: Path, dest: Path):
+    """Hard-link src to dest, copying when linking is not possible"""
+    try:
+        os.link(src, dest)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+class SegmentCache:
+    """Persistent cache of synthesized audio segments with an LRU size cap
+
+    Recency is tracked through file modification times, so several processes can
+    share one cache directory: writes are atomic renames and eviction tolerates
+    files that another process already removed. Entries are hard-linked in and
+    out where the filesystem allows, so segments are not copied.
+    """
+
+    def __init__(self, directory: str, max_size_mb: float = 500, enabled: bool = True):
+        """Open (and create if needed) a cache directory"""
+        self.directory = Path(directory)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._claims: Dict[str, list] = {}
+
+        if self.enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._size = self._scan_size() if self.enabled else 0
+
+    @staticmethod
+    def make_key(text: str, voice_id: str, model: str, voice_settings: Dict, output_format: str,
+                 backend: str = 'elevenlabs') -> str:
+        """Build the cache key for one segment"""
+        payload = {
+            'text': text,
+            'voice_id': voice_id,
+            'model': model,
+            'voice_settings': voice_settings,
+            'output_format': output_format,
+        }
+        # Keys for ElevenLabs segments predate other backends and stay as they were
+        if backend != 'elevenlabs':
+            payload['backend'] = backend
+        payload = json.dumps(payload, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        """Location of a cache entry (sharded by key prefix)"""
+        return self.directory / key[:2] / f"{key}.mp3"
+
+    def _entries(self):
+        """Yield (path, size, mtime) for every entry on disk"""
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith('.mp3'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    def _scan_size(self) -> int:
+        """Total size of all entries on disk"""
+        return sum(size for _, size, _ in self._entries())
+
+    @contextmanager
+    def claim(self, key: str):
+        """Hold a key while checking for and producing its segment
+
+        Threads asking for the same segment at the same time wait for the
+        first one, then find it in the cache instead of synthesizing it again.
+        """
+        with self._lock:
+            claim = self._claims.setdefault(key, [threading.Lock(), 0])
+            claim[1] += 1
+        try:
+            with claim[0]:
+                yield
+        finally:
+            with self._lock:
+                claim[1] -= 1
+                if not claim[1]:
+                    del self._claims[key]
+
+    def fetch(self, key: str, dest: Path) -> bool:
+        """Place a cached segment at `dest`; returns False on a miss"""
+        if not self.enabled:
+            return False
+
+        path = self._path(key)
+        try:
+            _link_or_copy(path, dest)
+            os.utime(path)  # Mark as recently used
+            hit = True
+        except FileNotFoundError:
+            hit = False
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit
+
+    def store(self, key: str, src: Path):
+        """Add a synthesized segment file and evict old entries if over the size cap"""
+        if not self.enabled:
+            return
+        size = os.path.getsize(src)
+        if not size:
+            return
+
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+
+        # Stage next to the entry and rename, so readers never see a partial segment
+        tmp_path = path.parent / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        _link_or_copy(Path(src), tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.writes += 1
+            self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits its cap (lock held)"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+
+        # Shrink to 90% of the cap so eviction does not run on every write
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+    def clear(self):
+        """Delete every cached segment"""
+        with self._lock:
+            if self.directory.exists():
+                shutil.rmtree(self.directory)
+            if self.enabled:
+                self.directory.mkdir(parents=True, exist_ok=True)
+            self._size = 0
+
+    def stats(self) -> Dict:
+        """Counters for the generation report"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'size_bytes': self._size,
+            }